@@ -6,11 +6,15 @@ import os
 
 # Imports locais
 from core.exchange_manager import ExchangeManager
+from core.candle_store import CandleStore
 from core.strategies import StrategyEngine
-from core.backtest_engine import run_backtest
-from core.optimizer import optimize_strategy
-from core.gru_model import GRUModel
-from core.indicators import add_indicators
+from core.backtest_engine import run_backtest_signals
+from core.indicators import FEATURE_CACHE
+from core.metrics import MIN_CAGR_DAYS
+from core.resample import can_resample, htf_bars, timeframe_ms
+# core.optimizer (Optuna) e core.model_registry (TensorFlow/Keras, scikit-learn) são
+# importados só dentro das abas que os usam, para não pesar no carregamento inicial.
+# benchmarks/bench_startup.py garante que continuem fora do caminho de inicialização.
 
 # Configuração da Página
 st.set_page_config(page_title="AI Trading Bot Pro", layout="wide", page_icon="📈")
@@ -60,7 +64,14 @@ symbol = st.sidebar.text_input("Símbolo", default_symbol)
 timeframe = st.sidebar.selectbox("Timeframe", ["1m", "5m", "15m", "1h", "4h", "1d"], index=3)
 
 # Inicialização da Exchange
-exchange = ExchangeManager(exchange_name, api_key, api_secret, testnet=is_testnet, market_type=market_type_default)
+# Os candles ficam salvos em disco: cada atualização baixa apenas as barras novas.
+# A instância sobrevive aos reruns para manter os caches de mercados e saldo.
+@st.cache_resource
+def get_exchange(exchange_name, api_key, api_secret, is_testnet, market_type):
+    return ExchangeManager(exchange_name, api_key, api_secret, testnet=is_testnet,
+                           market_type=market_type, store=CandleStore())
+
+exchange = get_exchange(exchange_name, api_key, api_secret, is_testnet, market_type_default)
 
 # --- Tabs ---
 # (O restante do código das abas permanece igual...)
@@ -68,16 +79,31 @@ exchange = ExchangeManager(exchange_name, api_key, api_secret, testnet=is_testne
 # --- Tabs ---
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 Trade & Estratégias", "🧠 AI / GRU", "📊 Backtest", "🧪 Otimização", "📡 Execução"])
 
+# Modelos GRU treinados ficam em disco e em memória entre reruns
+@st.cache_resource
+def get_model_registry():
+    from core.model_registry import ModelRegistry
+    return ModelRegistry()
+
 # Carregar Dados (Cache)
+# Indicadores não são mais calculados aqui: cada estratégia pede as features
+# que usa e elas ficam no FEATURE_CACHE compartilhado.
+# Ao trocar de timeframe, se já houver um timeframe menor salvo com histórico
+# suficiente, os candles são agregados localmente em vez de baixados de novo.
+# O histórico cobre pelo menos a SMA 50 do 4h do filtro de tendência (mais o primeiro
+# candle de 4h, que pode estar incompleto, e o que ainda está em formação).
+def history_limit(tf, minimum=500, trend_tf='4h', trend_window=50):
+    if not can_resample(tf, trend_tf):
+        return minimum
+    return max(minimum, (trend_window + 2) * (timeframe_ms(trend_tf) // timeframe_ms(tf)))
+
 @st.cache_data(ttl=300)
-def load_data(sym, tf, limit=500):
-    df = exchange.fetch_ohlcv(sym, tf, limit)
-    if not df.empty:
-        df = add_indicators(df)
-    return df
+def load_data(sym, tf):
+    return exchange.fetch_ohlcv(sym, tf, history_limit(tf))
 
 if st.sidebar.button("Atualizar Dados"):
     st.cache_data.clear()
+    FEATURE_CACHE.clear()
 
 df = load_data(symbol, timeframe)
 
@@ -93,26 +119,36 @@ with tab1:
                                 ["MA Cross", "MA + Estocástico", "MA + RSI"])
     
     strat_engine = StrategyEngine(df)
-    df_strategy = df.copy()
+    # Sinais da estratégia escolhida (SignalResult), usados também no Backtest
+    signals = None
     
     if strat_choice == "MA Cross":
         col1, col2 = st.columns(2)
         fast = col1.number_input("MA Rápida", 5, 100, 9)
         slow = col2.number_input("MA Lenta", 10, 300, 21)
-        df_strategy = strat_engine.ma_cross(fast, slow)
+        # Tendência do 4h reamostrada dos próprios candles (só para timeframes menores e
+        # com histórico para a SMA 50 do 4h; o primeiro candle de 4h pode estar incompleto)
+        trend_ready = can_resample(timeframe, '4h') and htf_bars(len(df), timeframe, '4h') > 50
+        trend_filter = st.checkbox("Filtro de tendência (SMA 50 do 4h)", value=False, disabled=not trend_ready,
+                                   help=None if trend_ready else
+                                   "Precisa de um timeframe menor que 4h e de mais de 50 candles de 4h no histórico")
+        if trend_filter:
+            signals = strat_engine.ma_cross_trend_signals(timeframe, fast, slow, trend_tf='4h', trend_window=50)
+        else:
+            signals = strat_engine.ma_cross_signals(fast, slow)
         
         # Plot
-        fig = go.Figure(data=[go.Candlestick(x=df_strategy['timestamp'],
-                        open=df_strategy['open'], high=df_strategy['high'],
-                        low=df_strategy['low'], close=df_strategy['close'], name="OHLC")])
-        fig.add_trace(go.Scatter(x=df_strategy['timestamp'], y=df_strategy['fast_ma'], line=dict(color='orange', width=1), name='Fast MA'))
-        fig.add_trace(go.Scatter(x=df_strategy['timestamp'], y=df_strategy['slow_ma'], line=dict(color='blue', width=1), name='Slow MA'))
+        fig = go.Figure(data=[go.Candlestick(x=df['timestamp'],
+                        open=df['open'], high=df['high'],
+                        low=df['low'], close=df['close'], name="OHLC")])
+        fig.add_trace(go.Scatter(x=df['timestamp'], y=signals.aux['fast_ma'], line=dict(color='orange', width=1), name='Fast MA'))
+        fig.add_trace(go.Scatter(x=df['timestamp'], y=signals.aux['slow_ma'], line=dict(color='blue', width=1), name='Slow MA'))
         
         # Sinais
-        buys = df_strategy[df_strategy['signal'] == 1]
-        sells = df_strategy[df_strategy['signal'] == -1]
-        fig.add_trace(go.Scatter(x=buys['timestamp'], y=buys['close'], mode='markers', marker=dict(symbol='triangle-up', size=10, color='green'), name='Buy'))
-        fig.add_trace(go.Scatter(x=sells['timestamp'], y=sells['close'], mode='markers', marker=dict(symbol='triangle-down', size=10, color='red'), name='Sell'))
+        buys = signals.signal == 1
+        sells = signals.signal == -1
+        fig.add_trace(go.Scatter(x=df['timestamp'][buys], y=df['close'][buys], mode='markers', marker=dict(symbol='triangle-up', size=10, color='green'), name='Buy'))
+        fig.add_trace(go.Scatter(x=df['timestamp'][sells], y=df['close'][sells], mode='markers', marker=dict(symbol='triangle-down', size=10, color='red'), name='Sell'))
         
         fig.update_layout(height=600, template="plotly_dark")
         st.plotly_chart(fig, use_container_width=True)
@@ -127,25 +163,30 @@ with tab2:
     epochs = col2.number_input("Épocas de Treino", 1, 50, 5)
     layers = col3.number_input("Camadas GRU", 1, 5, 2)
     
+    force_retrain = st.checkbox("Forçar treino do zero (ignora modelo salvo)")
+    
     if st.button("Treinar Modelo GRU"):
         with st.spinner("Treinando Rede Neural... (Isso pode demorar)"):
-            gru = GRUModel(lookback=lookback)
-            X, y, scaler = gru.prepare_data(df)
+            from core.model_registry import load_or_train_gru
             
-            # Split treino/teste
-            split = int(len(X) * 0.8)
-            X_train, X_test = X[:split], X[split:]
-            y_train, y_test = y[:split], y[split:]
+            # Split treino/teste (em número de janelas)
+            split = int((len(df) - lookback) * 0.8)
             
-            model = gru.build_model(layers=layers)
-            history = gru.train(X_train, y_train, epochs=epochs)
+            # Reaproveita o modelo salvo para este símbolo/timeframe/arquitetura:
+            # carrega direto se os dados não mudaram ou faz fine-tuning só nos candles novos
+            gru, status = load_or_train_gru(df, symbol, timeframe, lookback=lookback, layers=layers,
+                                            epochs=epochs, train_end=split, registry=get_model_registry(),
+                                            force=force_retrain)
+            status_msg = {'cached': "Modelo carregado do disco (sem treino).",
+                          'fine_tuned': "Modelo salvo atualizado com os candles novos.",
+                          'trained': "Modelo Treinado!"}
+            st.success(status_msg[status])
             
-            st.success("Modelo Treinado!")
-            
-            # Previsão
-            predicted = gru.predict(X_test)
-            predicted_prices = gru.scaler.inverse_transform(predicted)
-            real_prices = gru.scaler.inverse_transform(y_test.reshape(-1, 1))
+            # Previsão: uma única inferência em lote dá o próximo fechamento de cada
+            # candle (teste e último candle juntos)
+            next_close = gru.predict_next_close(df)
+            real_prices = df['close'].to_numpy()[lookback + split:]
+            predicted_prices = next_close[lookback + split - 1:-1]
             
             # Gráfico de Previsão
             fig_gru = go.Figure()
@@ -155,9 +196,7 @@ with tab2:
             st.plotly_chart(fig_gru, use_container_width=True)
             
             # Sinal Atual (Último candle)
-            last_sequence = X[-1].reshape(1, lookback, 1)
-            next_pred = gru.predict(last_sequence)
-            next_price = gru.scaler.inverse_transform(next_pred)[0][0]
+            next_price = next_close[-1]
             current_price = df['close'].iloc[-1]
             
             st.metric("Preço Atual", f"{current_price:.2f}")
@@ -171,30 +210,95 @@ with tab3:
     bt_fee = st.number_input("Taxa (%)", 0.0, 1.0, 0.1) / 100
     
     if st.button("Rodar Backtest (Estratégia Atual)"):
-        # Usa a estratégia configurada na Tab 1
-        res_df, metrics, trades_df = run_backtest(df_strategy, initial_capital=bt_capital, fee_pct=bt_fee)
-        
-        c1, c2, c3 = st.columns(3)
-        c1.metric("Retorno Total", f"{metrics['Total Return %']:.2f}%")
-        c2.metric("Capital Final", f"${metrics['Final Equity']:.2f}")
-        c3.metric("Total Trades", metrics['Num Trades'])
-        
-        st.line_chart(res_df['equity'])
-        st.dataframe(trades_df)
+        if signals is None:
+            st.warning("A estratégia selecionada na aba 1 ainda não gera sinais.")
+        else:
+            # Usa a estratégia configurada na Tab 1
+            try:
+                res_df, metrics, trades_df = run_backtest_signals(df, signals, initial_capital=bt_capital, fee_pct=bt_fee)
+            except ValueError as e:
+                # Nenhuma barra válida (histórico curto para os indicadores da estratégia)
+                st.warning(str(e))
+                res_df = None
+            
+            if res_df is not None:
+                c1, c2, c3 = st.columns(3)
+                c1.metric("Retorno Total", f"{metrics['Total Return %']:.2f}%")
+                c2.metric("Capital Final", f"${metrics['Final Equity']:.2f}")
+                c3.metric("Total Trades", metrics['Num Trades'])
+            
+                c1, c2, c3, c4 = st.columns(4)
+                c1.metric("Sharpe", f"{metrics['Sharpe']:.2f}")
+                c2.metric("Sortino", f"{metrics['Sortino']:.2f}")
+                c3.metric("Max Drawdown", f"{metrics['Max Drawdown %']:.2f}%")
+                c4.metric("Win Rate", f"{metrics['Win Rate %']:.1f}%")
+            
+                c1, c2, c3, c4 = st.columns(4)
+                c1.metric("CAGR", "-" if pd.isna(metrics['CAGR %']) else f"{metrics['CAGR %']:.2f}%",
+                          help=f"Só é anualizado com pelo menos {MIN_CAGR_DAYS} dias de dados")
+                c2.metric("Profit Factor", f"{metrics['Profit Factor']:.2f}")
+                c3.metric("Exposição", f"{metrics['Exposure %']:.1f}%")
+                c4.metric("Duração Média (candles)", f"{metrics['Avg Trade Duration']:.1f}")
+            
+                st.line_chart(res_df['equity'])
+                st.dataframe(trades_df)
 
 # --- TAB 4: Otimização ---
 with tab4:
     st.header("Otimização de Parâmetros (MA Cross)")
     st.write("Encontra os melhores valores de MA Rápida e Lenta para os dados atuais.")
     
-    n_trials = st.slider("Número de Tentativas", 10, 100, 20)
+    full_grid = st.checkbox("Varredura completa (todas as combinações de uma vez)")
+    n_trials = st.slider("Número de Tentativas", 10, 100, 20, disabled=full_grid)
+    
+    c1, c2 = st.columns(2)
+    parallel = c1.checkbox("Paralelo (estudo salvo em disco, retoma se interrompido)", disabled=full_grid)
+    n_workers = c2.number_input("Workers", 1, os.cpu_count() or 1, os.cpu_count() or 1, disabled=not parallel)
+    metric_options = ["Total Return %", "Sharpe", "Sortino", "CAGR %", "Max Drawdown %", "Profit Factor", "Win Rate %"]
+    if (df['timestamp'].iloc[-1] - df['timestamp'].iloc[0]).days < MIN_CAGR_DAYS:
+        # Janela curta demais para anualizar: o CAGR seria NaN em todas as tentativas
+        metric_options.remove("CAGR %")
+    opt_metric = st.selectbox("Métrica a otimizar", metric_options, disabled=full_grid or parallel)
     
     if st.button("Otimizar"):
         with st.spinner("Otimizando com Optuna..."):
-            best_params, best_value = optimize_strategy(df, n_trials)
+            from core.optimizer import optimize_strategy, optimize_strategy_grid, optimize_strategy_parallel, data_fingerprint
+            
+            if full_grid:
+                best_params, best_value = optimize_strategy_grid(df)
+            elif parallel:
+                study_name = f"ma_cross_{exchange_name}_{symbol}_{timeframe}".replace('/', '')
+                best_params, best_value = optimize_strategy_parallel(
+                    df, n_trials, n_workers=n_workers,
+                    study_name=f"{study_name}_{data_fingerprint(df)}")
+            else:
+                best_params, best_value = optimize_strategy(df, n_trials, metric=opt_metric)
             st.success(f"Melhores Parâmetros Encontrados!")
             st.json(best_params)
-            st.metric("Melhor Retorno (%)", f"{best_value:.2f}%")
+            if full_grid or parallel or opt_metric == "Total Return %":
+                st.metric("Melhor Retorno (%)", f"{best_value:.2f}%")
+            else:
+                st.metric(f"Melhor {opt_metric}", f"{best_value:.2f}")
+
+    st.subheader("Walk-Forward (fora da amostra)")
+    c1, c2 = st.columns(2)
+    wf_train = c1.number_input("Candles de treino por fold", 100, 100000, 250)
+    wf_test = c2.number_input("Candles de teste por fold", 20, 50000, 50)
+
+    if st.button("Rodar Walk-Forward"):
+        with st.spinner("Otimizando e validando fold a fold..."):
+            from core.optimizer import walk_forward
+
+            try:
+                folds_df, oos_equity, wf_metrics = walk_forward(df, wf_train, wf_test, n_workers=n_workers)
+            except ValueError as e:
+                st.warning(str(e))
+            else:
+                c1, c2 = st.columns(2)
+                c1.metric("Retorno Fora da Amostra", f"{wf_metrics['OOS Return %']:.2f}%")
+                c2.metric("Folds Positivos", f"{wf_metrics['Positive Folds %']:.0f}%")
+                st.line_chart(oos_equity.set_index('timestamp')['equity'])
+                st.dataframe(folds_df)
 
 # --- TAB 5: Execução ---
 with tab5:
@@ -219,7 +323,8 @@ with tab5:
         
         if st.button("ENVIAR ORDEM DE MERCADO"):
             with st.spinner("Enviando ordem..."):
-                resp = exchange.create_order(symbol, order_side, order_amt)
+                # Último close como referência para validar o valor mínimo antes de enviar
+                resp = exchange.create_order(symbol, order_side, order_amt, ref_price=df['close'].iloc[-1])
                 if resp:
                     st.success(f"Ordem executada! ID: {resp['id']}")
                     st.json(resp)
@@ -0,0 +1,45 @@
+"""
+Compara o kernel vetorizado de run_backtest com o loop original (df.iloc)
+e reporta barras/segundo. A equivalência completa (equity, métricas e trades)
+é verificada em tests/test_backtest.py; aqui só confere o capital final.
+
+Uso: python -m benchmarks.bench_backtest --bars 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.backtest_engine import run_backtest, run_backtest_loop
+from core.strategies import StrategyEngine
+from benchmarks.synthetic import make_ohlcv
+
+def time_call(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bars', type=int, default=100_000)
+    parser.add_argument('--loop-bars', type=int, default=20_000,
+                        help='Tamanho usado para o loop original (lento).')
+    args = parser.parse_args()
+
+    df_sig = StrategyEngine(make_ohlcv(args.bars)).ma_cross(9, 21)
+    df_small = df_sig.iloc[:args.loop_bars]
+
+    final_vec = run_backtest(df_small)[1]['Final Equity']
+    final_loop = run_backtest_loop(df_small)[1]['Final Equity']
+    np.testing.assert_allclose(final_vec, final_loop, rtol=1e-9)
+
+    t_loop = time_call(run_backtest_loop, df_small, repeat=1)
+    t_vec = time_call(run_backtest, df_sig)
+    print(f"loop  (df.iloc): {len(df_small) / t_loop:>14,.0f} barras/s")
+    print(f"kernel vetorial: {len(df_sig) / t_vec:>14,.0f} barras/s")
+
+if __name__ == '__main__':
+    main()
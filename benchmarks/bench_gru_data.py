@@ -0,0 +1,82 @@
+"""
+Compara a montagem do dataset do GRU: loop original com listas, janelas
+via sliding_window_view e pipeline tf.data. Cada caso roda num processo
+novo e vai até um `model.fit` de verdade, porque o Keras copia as janelas de
+uma view para tensores; o pico de memória é o RSS do processo (inclui as
+alocações do TensorFlow, que o tracemalloc não vê), medido acima do que já
+estava em uso depois de importar o TensorFlow e montar o modelo.
+
+Uso: python -m benchmarks.bench_gru_data --bars 50000 --lookback 60
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+
+import numpy as np
+
+def prepare_data_loop(model, df, target_col='close'):
+    # Implementação original de GRUModel.prepare_data (referência)
+    data = df[target_col].values.reshape(-1, 1)
+    scaled_data = model.scaler.fit_transform(data)
+    X, y = [], []
+    for i in range(model.lookback, len(scaled_data)):
+        X.append(scaled_data[i - model.lookback:i, 0])
+        y.append(scaled_data[i, 0])
+    X, y = np.array(X), np.array(y)
+    return np.reshape(X, (X.shape[0], X.shape[1], 1)), y
+
+def peak_rss_mib():
+    # ru_maxrss: KiB no Linux, bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+def run_case(case, args, queue):
+    from core.gru_model import GRUModel
+    from benchmarks.synthetic import make_ohlcv
+
+    df = make_ohlcv(args.bars)
+    model = GRUModel(lookback=args.lookback)
+    model.build_model(units=args.units, layers=1)
+    before = peak_rss_mib()
+
+    t0 = time.perf_counter()
+    if case == 'loop (listas)':
+        X, y = prepare_data_loop(model, df)
+        prepared = time.perf_counter() - t0
+        model.model.fit(X, y, epochs=1, batch_size=args.batch_size, verbose=0)
+    elif case == 'sliding_window_view':
+        X, y, _ = model.prepare_data(df)
+        prepared = time.perf_counter() - t0
+        model.model.fit(X, y, epochs=1, batch_size=args.batch_size, verbose=0)
+    else:
+        dataset = model.make_dataset(df, batch_size=args.batch_size)
+        prepared = time.perf_counter() - t0
+        model.model.fit(dataset, epochs=1, verbose=0)
+    total = time.perf_counter() - t0
+    queue.put((prepared, total, peak_rss_mib() - before))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=50_000)
+    parser.add_argument('--lookback', type=int, default=60)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--units', type=int, default=32)
+    args = parser.parse_args()
+
+    # spawn: cada caso começa com RSS limpo, sem herdar o pico dos anteriores
+    ctx = multiprocessing.get_context('spawn')
+    n_windows = args.bars - args.lookback
+    print(f"{args.bars:,} barras, {n_windows:,} janelas de {args.lookback} (1 época)")
+    print(f"{'caso':<22}{'preparo (ms)':>14}{'janelas/s (fit)':>18}{'pico RSS (MiB)':>16}")
+    for case in ('loop (listas)', 'sliding_window_view', 'tf.data (lotes)'):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_case, args=(case, args, queue))
+        proc.start()
+        prepared, total, peak = queue.get()
+        proc.join()
+        print(f"{case:<22}{prepared * 1e3:>14.1f}{n_windows / total:>18,.0f}{peak:>16.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Mede o custo por candle do caminho incremental (StreamingIndicators) vs
+recalcular tudo com add_indicators. A equivalência com a biblioteca `ta`
+é verificada em tests/test_streaming_indicators.py.
+
+Uso: python -m benchmarks.bench_indicators --bars 5000
+"""
+import argparse
+import time
+
+from core.indicators import FeatureCache, add_indicators
+from core.streaming_indicators import StreamingIndicators
+from benchmarks.synthetic import make_ohlcv
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bars', type=int, default=5000)
+    args = parser.parse_args()
+
+    df = make_ohlcv(args.bars)
+    half = len(df) // 2
+
+    stream = StreamingIndicators()
+    stream.warm_up(df)
+    t0 = time.perf_counter()
+    for h, l, c in zip(df['high'], df['low'], df['close']):
+        stream.update(h, l, c)
+    per_update = (time.perf_counter() - t0) / len(df)
+
+    stream = StreamingIndicators()
+    stream.warm_up(df.iloc[:half])
+    candles = df.iloc[half:].to_dict('records')
+    t0 = time.perf_counter()
+    for candle in candles:
+        stream.append(candle)
+    per_append = (time.perf_counter() - t0) / len(candles)
+
+    t0 = time.perf_counter()
+    add_indicators(df.copy(), cache=FeatureCache())
+    full = time.perf_counter() - t0
+    print(f"incremental (update): {per_update * 1e6:10.1f} µs/candle")
+    print(f"incremental (append): {per_append * 1e6:10.1f} µs/candle")
+    print(f"add_indicators completo ({len(df)} barras): {full * 1e3:10.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Mede o custo de core.metrics.compute_metrics em relação ao backtest inteiro
+(run_backtest_signals), para garantir que cabe dentro de cada trial do Optuna.
+
+Uso: python -m benchmarks.bench_metrics --bars 100000
+"""
+import argparse
+import time
+
+from core.backtest_engine import backtest_kernel, run_backtest_signals
+from core.metrics import compute_metrics
+from core.strategies import StrategyEngine
+from benchmarks.synthetic import make_ohlcv
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bars', type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = make_ohlcv(args.bars)
+    signals = StrategyEngine(df).ma_cross_signals(9, 21)
+    valid = signals.valid_mask()
+    close = df['close'].to_numpy()[valid]
+    equity, position, entries, exits = backtest_kernel(close, signals.signal[valid])[:4]
+    timestamps = df['timestamp'].to_numpy()[valid]
+
+    t_metrics = best_of(lambda: compute_metrics(equity, position, 1000, timestamps, entries=entries, exits=exits))
+    t_backtest = best_of(lambda: run_backtest_signals(df, signals))
+    print(f"compute_metrics:      {t_metrics * 1e3:8.2f} ms")
+    print(f"run_backtest_signals: {t_backtest * 1e3:8.2f} ms (já inclui as métricas)")
+    print(f"parcela das métricas: {t_metrics / t_backtest * 100:8.1f} %")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark do pipeline completo dados -> indicadores -> estratégia -> backtest
+(e janelas do GRU) sobre candles sintéticos, sem acesso à exchange.
+
+Para cada tamanho e etapa mede o melhor tempo de `--repeat` execuções e o pico
+de memória (tracemalloc, numa execução à parte para não distorcer o tempo).
+Compara com um baseline salvo e termina com código 1 se alguma etapa ficar
+mais lenta ou gastar mais memória que `--threshold` (fração) acima dele.
+
+Uso:
+    python -m benchmarks.bench_pipeline --bars 10000 100000 1000000 --save-baseline
+    python -m benchmarks.bench_pipeline --threshold 0.2
+    python -m benchmarks.bench_pipeline --stages add_indicators run_backtest --profile perf/
+Os arquivos .prof de `--profile` abrem no snakeviz ou viram flamegraph com flameprof.
+"""
+import argparse
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from core.indicators import FeatureCache, add_indicators
+from core.strategies import StrategyEngine
+from core.backtest_engine import run_backtest
+from core.paths import data_path
+from benchmarks.synthetic import make_ohlcv
+
+def _stage_add_indicators(df):
+    # Cache novo a cada execução: mede o cálculo, não o acerto no FEATURE_CACHE
+    return add_indicators(df.copy(), cache=FeatureCache())
+
+def _stage_ma_cross(df):
+    return StrategyEngine(df, cache=FeatureCache()).ma_cross(9, 21)
+
+def _stage_run_backtest(df):
+    return run_backtest(df)
+
+def _stage_prepare_data(df):
+    # TensorFlow só é importado se esta etapa for pedida
+    from core.gru_model import GRUModel
+    return GRUModel(lookback=60).prepare_data(df)
+
+# Etapa -> (função, etapa cuja saída serve de entrada)
+STAGES = {
+    'add_indicators': (_stage_add_indicators, None),
+    'ma_cross': (_stage_ma_cross, None),
+    'run_backtest': (_stage_run_backtest, 'ma_cross'),
+    'prepare_data': (_stage_prepare_data, None),
+}
+
+def time_stage(fn, df, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def peak_memory(fn, df):
+    tracemalloc.start()
+    fn(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def profile_stage(fn, df, path):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    fn(df)
+    profiler.disable()
+    profiler.dump_stats(path)
+
+def run(sizes, stages, repeat, profile_dir=None):
+    """Retorna {'<etapa>@<barras>': {'seconds', 'bars_per_sec', 'peak_mib'}}."""
+    results = {}
+    for n_bars in sizes:
+        df = make_ohlcv(n_bars)
+        inputs = {}
+        for stage in stages:
+            fn, source = STAGES[stage]
+            if source is not None:
+                if source not in inputs:
+                    inputs[source] = STAGES[source][0](df)
+                stage_input = inputs[source]
+            else:
+                stage_input = df
+            # Aquecimento (imports, alocações iniciais) fora da medição
+            inputs[stage] = fn(stage_input)
+            seconds = time_stage(fn, stage_input, repeat)
+            peak = peak_memory(fn, stage_input)
+            if profile_dir:
+                os.makedirs(profile_dir, exist_ok=True)
+                profile_stage(fn, stage_input, os.path.join(profile_dir, f"{stage}_{n_bars}.prof"))
+            results[f"{stage}@{n_bars}"] = {
+                'seconds': seconds,
+                'bars_per_sec': n_bars / seconds,
+                'peak_mib': peak / 2**20,
+            }
+    return results
+
+def compare(results, baseline, threshold):
+    """Lista (chave, métrica, atual, baseline) das etapas acima do limite."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ('seconds', 'peak_mib'):
+            if current[metric] > base[metric] * (1 + threshold):
+                regressions.append((key, metric, current[metric], base[metric]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=data_path('benchmarks', 'pipeline_baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help="grava os resultados como novo baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="regressão tolerada (0.2 = 20%%)")
+    parser.add_argument('--profile', metavar='DIR', help="salva um .prof do cProfile por etapa/tamanho")
+    args = parser.parse_args()
+
+    results = run(args.bars, args.stages, args.repeat, args.profile)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"{'etapa':<28}{'tempo (ms)':>12}{'barras/s':>16}{'pico (MiB)':>12}{'vs baseline':>14}")
+    for key, r in results.items():
+        base = baseline.get(key)
+        delta = f"{r['seconds'] / base['seconds'] - 1:+.1%}" if base else '-'
+        print(f"{key:<28}{r['seconds'] * 1e3:>12.1f}{r['bars_per_sec']:>16,.0f}{r['peak_mib']:>12.1f}{delta:>14}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({**baseline, **results}, f, indent=2)
+        print(f"Baseline salvo em {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    for key, metric, current, base in regressions:
+        print(f"REGRESSÃO {key} {metric}: {current:.4g} vs baseline {base:.4g}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
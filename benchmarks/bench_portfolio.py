@@ -0,0 +1,49 @@
+"""
+Mede run_portfolio_backtest sobre uma matriz sintética (símbolos x barras):
+tempo, barras-símbolo por segundo e pico de memória (tracemalloc, numa execução
+à parte) para o bloco derivado de `--memory-mib`.
+
+Uso: python -m benchmarks.bench_portfolio --symbols 100 --bars 1000000 --memory-mib 256
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from core.backtest_engine import portfolio_chunk_size, run_portfolio_backtest
+
+def make_matrix(n_symbols, n_bars, seed=42):
+    # Passeios aleatórios por símbolo e sinais esparsos (cerca de 1% das barras)
+    rng = np.random.default_rng(seed)
+    close = 30000.0 * np.exp(np.cumsum(rng.normal(0, 0.001, (n_symbols, n_bars)), axis=1))
+    signals = rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=(n_symbols, n_bars), p=[0.005, 0.99, 0.005])
+    return close, signals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--bars', type=int, default=1_000_000)
+    parser.add_argument('--memory-mib', type=int, default=256, help="orçamento de memória por bloco")
+    args = parser.parse_args()
+
+    close, signals = make_matrix(args.symbols, args.bars)
+    budget = args.memory_mib * 2**20
+    print(f"{args.symbols} símbolos x {args.bars:,} barras "
+          f"(entrada {(close.nbytes + signals.nbytes) / 2**20:.0f} MiB), "
+          f"bloco de {portfolio_chunk_size(args.bars, budget)} símbolos")
+
+    t0 = time.perf_counter()
+    _, _, trades, metrics = run_portfolio_backtest(close, signals, memory_budget=budget)
+    seconds = time.perf_counter() - t0
+    print(f"tempo: {seconds:.2f} s   {args.symbols * args.bars / seconds:,.0f} barras-símbolo/s   "
+          f"{metrics['Num Trades']:,} trades")
+
+    tracemalloc.start()
+    run_portfolio_backtest(close, signals, memory_budget=budget)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"pico de memória além da entrada: {peak / 2**20:.0f} MiB (orçamento {args.memory_mib} MiB)")
+
+if __name__ == '__main__':
+    main()
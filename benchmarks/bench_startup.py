@@ -0,0 +1,72 @@
+"""
+Mede o custo dos imports de topo do app.py com `python -X importtime` e falha
+(exit 1) se alguma dependência pesada voltar ao caminho de inicialização ou se
+o tempo total passar do limite.
+
+Uso: python -m benchmarks.bench_startup --max-ms 3000
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Só podem ser carregadas dentro das abas/funções que as usam
+HEAVY_MODULES = ('tensorflow', 'keras', 'optuna', 'sklearn')
+
+def top_level_imports(path):
+    # Imports executados ao rodar o script (nível de módulo), ignorando os de dentro de funções/blocos
+    tree = ast.parse(open(path, encoding='utf-8').read())
+    lines = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(ast.unparse(node))
+    return lines
+
+def import_times(statements):
+    # Roda os imports num processo limpo e devolve {módulo: (tempo cumulativo em µs, profundidade)}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', '\n'.join(statements)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split(':', 1)[1].split('|')
+        # A indentação do nome indica o nível de aninhamento do import
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(cumulative_us), depth)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--max-ms', type=float, default=3000.0,
+                        help='Limite para o tempo total dos imports de topo.')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    statements = top_level_imports(os.path.join(ROOT, 'app.py'))
+    times = import_times(statements)
+
+    # Só os imports diretos (profundidade 0) somam o total, sem contar aninhados duas vezes
+    total_ms = sum(t for t, depth in times.values() if depth == 0) / 1000
+    print(f"Imports de topo do app.py: {total_ms:.0f} ms")
+    direct = sorted(((t, name) for name, (t, depth) in times.items() if depth == 0), reverse=True)
+    for t, name in direct[:args.top]:
+        print(f"  {t / 1000:8.1f} ms  {name}")
+
+    loaded_heavy = sorted({name.split('.')[0] for name in times} & set(HEAVY_MODULES))
+    failed = False
+    if loaded_heavy:
+        print(f"ERRO: dependências pesadas carregadas na inicialização: {', '.join(loaded_heavy)}")
+        failed = True
+    if total_ms > args.max_ms:
+        print(f"ERRO: {total_ms:.0f} ms acima do limite de {args.max_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
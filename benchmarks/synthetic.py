@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+def make_ohlcv(n_bars, start_price=30000.0, freq='1min', seed=42):
+    """
+    Gera candles OHLCV sintéticos (passeio aleatório geométrico) no mesmo
+    formato de ExchangeManager.fetch_ohlcv, para rodar sem acesso à exchange.
+    """
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.001, n_bars)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.0005, n_bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(3, 1, n_bars)
+    timestamp = pd.date_range('2020-01-01', periods=n_bars, freq=freq)
+    return pd.DataFrame({
+        'timestamp': timestamp,
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+    })
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import ccxt
+import ccxt.async_support as ccxt_async
+import pandas as pd
+from core.exchange_manager import ohlcv_to_frame
+
+logger = logging.getLogger(__name__)
+
+class AsyncExchangeManager:
+    """
+    Versão assíncrona do ExchangeManager para baixar vários símbolos/timeframes
+    em paralelo com um único cliente ccxt. Não depende do Streamlit: falhas são
+    registradas no log e o símbolo volta como DataFrame vazio.
+    """
+    def __init__(self, exchange_id, api_key=None, secret=None, testnet=False, market_type='swap',
+                 max_concurrency=8, max_retries=3, backoff=0.5, exchange=None):
+        self.exchange_id = exchange_id
+        self.testnet = testnet
+        self.market_type = market_type
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # `exchange` permite injetar um cliente (ex.: SimulatedExchange) no lugar do ccxt real
+        self.exchange = exchange or self._initialize_exchange(api_key, secret)
+
+    def _initialize_exchange(self, api_key, secret):
+        exchange_class = getattr(ccxt_async, self.exchange_id)
+        params = {
+            # O throttler do ccxt espaça as requisições mesmo com várias corrotinas ativas
+            'enableRateLimit': True,
+            'options': {'defaultType': self.market_type}
+        }
+        if api_key and secret:
+            params['apiKey'] = api_key
+            params['secret'] = secret
+
+        exchange = exchange_class(params)
+        if self.testnet:
+            exchange.set_sandbox_mode(True)
+        return exchange
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.exchange.close()
+
+    async def fetch_ohlcv(self, symbol, timeframe, limit=1000):
+        # Repete falhas transitórias de rede com backoff exponencial; erros da exchange sobem direto
+        for attempt in range(self.max_retries + 1):
+            try:
+                ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+                return ohlcv_to_frame(ohlcv)
+            except ccxt.NetworkError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning("Erro de rede em %s %s (%s), nova tentativa em %.1fs", symbol, timeframe, e, delay)
+                await asyncio.sleep(delay)
+
+    async def fetch_many(self, symbols, timeframes, limit=1000):
+        """
+        Baixa todas as combinações símbolo x timeframe com no máximo
+        `max_concurrency` requisições simultâneas.
+        Retorna {(symbol, timeframe): DataFrame}.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch_one(symbol, timeframe):
+            async with semaphore:
+                try:
+                    return await self.fetch_ohlcv(symbol, timeframe, limit)
+                except ccxt.BaseError as e:
+                    logger.error("Falha ao baixar %s %s: %s", symbol, timeframe, e)
+                    return pd.DataFrame()
+
+        keys = [(s, tf) for s in symbols for tf in timeframes]
+        frames = await asyncio.gather(*(fetch_one(s, tf) for s, tf in keys))
+        return dict(zip(keys, frames))
+
+def fetch_many_sync(exchange_id, symbols, timeframes, limit=1000, **kwargs):
+    # Atalho para código síncrono (ex.: Streamlit): abre o cliente, baixa tudo e fecha
+    async def run():
+        async with AsyncExchangeManager(exchange_id, **kwargs) as manager:
+            return await manager.fetch_many(symbols, timeframes, limit)
+    return asyncio.run(run())
@@ -1,27 +1,156 @@
 import pandas as pd
 import numpy as np
+from core.metrics import compute_metrics
+
+def position_from_signal(signal):
+    """
+    Converte o array de sinais (1, -1, 0) no estado da posição Long Only (1 ou 0).
+    Aceita 1D (barras) ou 2D (params x barras), operando sempre no último eixo.
+    Equivale à máquina de estados do loop: compra quando flat e sinal 1,
+    vende quando comprado e sinal -1, ignora o resto.
+    """
+    signal = np.asarray(signal)
+    n = signal.shape[-1]
+    # 1 -> comprado, -1 -> flat, 0 -> mantém o estado anterior (forward fill)
+    valid = (signal == 1) | (signal == -1)
+    last_idx = np.where(valid, np.arange(n), -1)
+    np.maximum.accumulate(last_idx, axis=-1, out=last_idx)
+    last_sig = np.take_along_axis(signal, np.maximum(last_idx, 0), axis=-1)
+    return ((last_idx >= 0) & (last_sig == 1)).astype(np.int8)
+
+def backtest_kernel(close, signal, initial_capital=1000, fee_pct=0.001):
+    """
+    Núcleo vetorizado do backtest (Long Only, execução no close).
+    Retorna (equity, position, entry_idx, exit_idx, capital_at_entry, capital_at_exit).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    position = position_from_signal(signal)
+
+    prev = np.concatenate(([0], position[:-1]))
+    change = position.astype(np.int8) - prev
+    entry_idx = np.flatnonzero(change == 1)
+    exit_idx = np.flatnonzero(change == -1)
+
+    entry_price = close[entry_idx]
+    exit_price = close[exit_idx]
+    n_closed = len(exit_idx)
+
+    # Capital disponível antes de cada trade: produto acumulado dos trades fechados
+    growth = (1 - fee_pct) ** 2 * exit_price / entry_price[:n_closed]
+    capital_before = initial_capital * np.concatenate(([1.0], np.cumprod(growth)))
+
+    trade_id = np.cumsum(change == 1) - 1
+    closed_so_far = np.cumsum(change == -1)
+
+    equity = capital_before[closed_so_far].astype(np.float64)
+    held = position == 1
+    if held.any():
+        tid = trade_id[held]
+        equity[held] = capital_before[tid] * (1 - fee_pct) * close[held] / entry_price[tid]
+
+    capital_at_entry = capital_before[:len(entry_idx)]
+    capital_at_exit = capital_before[1:n_closed + 1]
+    return equity, position, entry_idx, exit_idx, capital_at_entry, capital_at_exit
+
+def _trades_frame(close, dates, entry_idx, exit_idx, capital_at_entry, capital_at_exit):
+    if len(entry_idx) == 0:
+        return pd.DataFrame()
+
+    buys = pd.DataFrame({
+        'type': 'buy',
+        'price': close[entry_idx],
+        'date': dates[entry_idx],
+        'capital': capital_at_entry,
+        '_order': entry_idx * 2,
+    })
+    if len(exit_idx) == 0:
+        return buys.drop(columns='_order').reset_index(drop=True)
+
+    entry_price = close[entry_idx[:len(exit_idx)]]
+    sells = pd.DataFrame({
+        'type': 'sell',
+        'price': close[exit_idx],
+        'date': dates[exit_idx],
+        'capital': capital_at_exit,
+        'pnl': (close[exit_idx] - entry_price) / entry_price,
+        '_order': exit_idx * 2 + 1,
+    })
+    trades = pd.concat([buys, sells], ignore_index=True).sort_values('_order', kind='stable')
+    return trades.drop(columns='_order').reset_index(drop=True)
+
+def run_backtest_arrays(close, signal, timestamps, initial_capital=1000, fee_pct=0.001):
+    """
+    Backtest direto sobre arrays já limpos (sem NaN).
+    Retorna (equity, metrics, trades_df). Levanta ValueError se não houver barras.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) == 0:
+        raise ValueError("Nenhuma barra válida para o backtest (histórico menor que o aquecimento dos indicadores?)")
+    equity_curve, position, entry_idx, exit_idx, cap_in, cap_out = backtest_kernel(
+        close, signal, initial_capital, fee_pct)
+
+    # Métricas (retorno, Sharpe, drawdown, win rate etc.) numa passada vetorizada
+    metrics = compute_metrics(equity_curve, position, initial_capital, timestamps,
+                              entries=entry_idx, exits=exit_idx)
+
+    trades = _trades_frame(close, np.asarray(timestamps), entry_idx, exit_idx, cap_in, cap_out)
+    return equity_curve, metrics, trades
 
 def run_backtest(df, initial_capital=1000, fee_pct=0.001):
     """
     Executa backtest simples baseado na coluna 'signal' (1, -1, 0).
     Assume execução no preço de fechamento (close).
     """
+    # Garante que temos sinais limpos
+    df = df.dropna()
+
+    equity_curve, metrics, trades = run_backtest_arrays(
+        df['close'].to_numpy(), df['signal'].to_numpy(), df['timestamp'].to_numpy(),
+        initial_capital, fee_pct)
+
+    df_res = df.copy()
+    df_res['equity'] = equity_curve
+    return df_res, metrics, trades
+
+def run_backtest_signals(df, result, initial_capital=1000, fee_pct=0.001):
+    """
+    Backtest a partir de um SignalResult (array de sinais int8) sem copiar o DataFrame
+    de entrada. Barras em que o close ou alguma série auxiliar é NaN são ignoradas.
+    O df_res devolvido tem apenas timestamp, close, signal e equity.
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    valid = result.valid_mask() & ~np.isnan(close)
+
+    close = close[valid]
+    signal = result.signal[valid]
+    timestamps = df['timestamp'].to_numpy()[valid]
+    equity_curve, metrics, trades = run_backtest_arrays(close, signal, timestamps, initial_capital, fee_pct)
+
+    df_res = pd.DataFrame({'timestamp': timestamps, 'close': close, 'signal': signal,
+                           'equity': equity_curve}, index=df.index[valid])
+    return df_res, metrics, trades
+
+def run_backtest_loop(df, initial_capital=1000, fee_pct=0.001):
+    """
+    Implementação original linha a linha (df.iloc). Mantida como referência
+    para validar e medir o kernel vetorizado; não use no caminho quente.
+    """
     capital = initial_capital
     position = 0 # 0: Flat, 1: Long, -1: Short (se suportado)
     equity_curve = []
     trades = []
-    
+
     # Garante que temos sinais limpos
     df = df.dropna()
-    
+
     entry_price = 0
-    
+
     for i in range(len(df)):
         row = df.iloc[i]
         price = row['close']
         signal = row['signal']
         date = row['timestamp']
-        
+
         # Lógica simples Long Only para exemplo (pode expandir para Short)
         if position == 0 and signal == 1:
             # Compra
@@ -29,27 +158,137 @@ def run_backtest(df, initial_capital=1000, fee_pct=0.001):
             position = 1
             entry_price = price
             trades.append({'type': 'buy', 'price': price, 'date': date, 'capital': capital})
-            
+
         elif position == 1 and signal == -1:
             # Venda
             capital = amount * price * (1 - fee_pct)
             position = 0
             trades.append({'type': 'sell', 'price': price, 'date': date, 'capital': capital, 'pnl': (price - entry_price)/entry_price})
-            
+
         # Atualiza curva de capital
         current_equity = capital if position == 0 else amount * price
         equity_curve.append(current_equity)
-        
+
     df_res = df.iloc[:len(equity_curve)].copy()
     df_res['equity'] = equity_curve
-    
+
     # Métricas
     total_return = ((equity_curve[-1] - initial_capital) / initial_capital) * 100
-    
+
     metrics = {
         'Total Return %': total_return,
         'Final Equity': equity_curve[-1],
         'Num Trades': len(trades) // 2
     }
-    
+
     return df_res, metrics, pd.DataFrame(trades)
+
+def run_backtest_batch(close, signals, initial_capital=1000, fee_pct=0.001):
+    """
+    Simula várias curvas de capital de uma vez: signals tem forma (params x barras)
+    e todas as linhas compartilham o mesmo close. Mesma lógica Long Only do kernel.
+    Retorna (final_equity, num_trades), um valor por linha.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    signals = np.atleast_2d(signals)
+    n = signals.shape[1]
+    position = position_from_signal(signals)
+
+    prev = np.zeros_like(position)
+    prev[:, 1:] = position[:, :-1]
+    changed = position != prev
+
+    # Fator multiplicativo por barra: variação do preço enquanto comprado
+    # e uma taxa em cada entrada/saída
+    ratio = np.ones(n)
+    ratio[1:] = close[1:] / close[:-1]
+    log_factor = np.where(prev == 1, np.log(ratio), 0.0)
+    log_factor += changed * np.log(1 - fee_pct)
+
+    final_equity = initial_capital * np.exp(log_factor.sum(axis=1))
+    num_trades = changed.sum(axis=1) // 2
+    return final_equity, num_trades
+
+def align_closes(frames):
+    """
+    Alinha vários DataFrames OHLCV ({symbol: df}) numa matriz de close (símbolos x barras)
+    pela união dos timestamps. Barras sem dado ficam NaN.
+    Retorna (symbols, timestamps, close_matrix).
+    """
+    symbols = list(frames)
+    wide = pd.concat({s: frames[s].set_index('timestamp')['close'] for s in symbols}, axis=1).sort_index()
+    return symbols, wide.index.to_numpy(), wide.to_numpy(dtype=np.float64).T
+
+# Memória temporária (bytes) por célula símbolo x barra de um bloco do backtest de carteira
+PORTFOLIO_BYTES_PER_CELL = 56
+
+def portfolio_chunk_size(n_bars, memory_budget=256 * 2**20):
+    # Quantos símbolos por bloco cabem no orçamento de memória (pelo menos um)
+    return max(1, memory_budget // (max(n_bars, 1) * PORTFOLIO_BYTES_PER_CELL))
+
+def run_portfolio_backtest(close, signals, initial_capital=1000, fee_pct=0.001, weights=None, chunk_size=None,
+                           memory_budget=256 * 2**20):
+    """
+    Backtest de carteira sobre matrizes alinhadas (símbolos x barras).
+    O capital é dividido em fatias fixas por ativo (`weights`, padrão pesos iguais) e
+    cada fatia segue a mesma lógica Long Only do kernel, com taxa na entrada e na saída.
+    Tudo é vetorizado no eixo das barras; os símbolos são processados em blocos de
+    `chunk_size` (padrão: o que cabe em `memory_budget` bytes) para limitar a memória.
+    Barras com close NaN (ativo sem dado) não abrem posição e não mudam o valor da fatia.
+    Retorna (portfolio_equity, final_equity_por_ativo, trades, metrics), onde `trades` é
+    um dict de arrays colunar: symbol, bar, side (1 compra, -1 venda) e price.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    signals = np.atleast_2d(signals)
+    n_symbols, n_bars = close.shape
+    weights = np.full(n_symbols, 1.0 / n_symbols) if weights is None else np.asarray(weights, dtype=np.float64)
+    sleeves = initial_capital * weights
+    chunk_size = chunk_size or portfolio_chunk_size(n_bars, memory_budget)
+
+    portfolio_equity = np.zeros(n_bars)
+    final_equity = np.empty(n_symbols)
+    trade_symbol, trade_bar, trade_side = [], [], []
+    log_fee = np.log(1 - fee_pct)
+
+    for start in range(0, n_symbols, chunk_size):
+        end = min(start + chunk_size, n_symbols)
+        px = close[start:end]
+        missing = np.isnan(px)
+        position = position_from_signal(np.where(missing, 0, signals[start:end]))
+
+        prev = np.zeros_like(position)
+        prev[:, 1:] = position[:, :-1]
+        change = position.astype(np.int8) - prev
+
+        log_ratio = np.zeros(px.shape)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Preço anterior válido (forward fill) para atravessar buracos sem perder a variação
+            last_valid = np.where(~missing, np.arange(n_bars), 0)
+            np.maximum.accumulate(last_valid, axis=1, out=last_valid)
+            filled = np.take_along_axis(px, last_valid, axis=1)
+            log_ratio[:, 1:] = np.log(filled[:, 1:] / filled[:, :-1])
+        log_ratio[~np.isfinite(log_ratio)] = 0.0
+
+        log_factor = np.where(prev == 1, log_ratio, 0.0) + (change != 0) * log_fee
+        equity = sleeves[start:end, None] * np.exp(np.cumsum(log_factor, axis=1))
+        portfolio_equity += equity.sum(axis=0)
+        final_equity[start:end] = equity[:, -1]
+
+        sym, bar = np.nonzero(change)
+        trade_symbol.append(sym + start)
+        trade_bar.append(bar)
+        trade_side.append(change[sym, bar])
+
+    trades = {
+        'symbol': np.concatenate(trade_symbol).astype(np.int32),
+        'bar': np.concatenate(trade_bar).astype(np.int64),
+        'side': np.concatenate(trade_side).astype(np.int8),
+    }
+    trades['price'] = close[trades['symbol'], trades['bar']]
+
+    metrics = {
+        'Total Return %': (portfolio_equity[-1] - initial_capital) / initial_capital * 100,
+        'Final Equity': portfolio_equity[-1],
+        'Num Trades': len(trades['side']) // 2,
+    }
+    return portfolio_equity, final_equity, trades, metrics
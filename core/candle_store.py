@@ -0,0 +1,143 @@
+import io
+import os
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from core.paths import data_path
+from core.compact import CompactOHLCV
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+OHLCV_DTYPE = np.dtype([('timestamp', 'i8'), ('open', 'f8'), ('high', 'f8'),
+                        ('low', 'f8'), ('close', 'f8'), ('volume', 'f8')])
+
+def frame_from_array(arr, compact=False):
+    # Array estruturado -> DataFrame do app (timestamp datetime) ou CompactOHLCV
+    if compact:
+        return CompactOHLCV.from_array(arr)
+    df = pd.DataFrame({col: np.asarray(arr[col]) for col in OHLCV_COLUMNS})
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+class CandleStore:
+    """
+    Armazena candles OHLCV em disco, um arquivo .npy (array estruturado) por
+    exchange/símbolo/timeframe. Timestamps ficam em ms (int64), como o ccxt retorna.
+    A leitura usa memory-map, então carregar históricos longos é barato.
+    Seguro entre threads (sessões do Streamlit compartilham a mesma instância):
+    as gravações de cada arquivo são serializadas por um lock.
+    """
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, root=None):
+        self.root = root or os.path.dirname(data_path('candles', 'x'))
+
+    def _path(self, exchange_id, symbol, timeframe):
+        safe_symbol = symbol.replace('/', '-').replace(':', '_')
+        return os.path.join(self.root, exchange_id, safe_symbol, f"{timeframe}.npy")
+
+    @classmethod
+    def _lock(cls, path):
+        with cls._locks_guard:
+            return cls._locks.setdefault(path, threading.Lock())
+
+    def load_array(self, exchange_id, symbol, timeframe):
+        path = self._path(exchange_id, symbol, timeframe)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=OHLCV_DTYPE)
+        return np.load(path, mmap_mode='r')
+
+    def load(self, exchange_id, symbol, timeframe, limit=None, compact=False):
+        # compact=True devolve um CompactOHLCV (float32/int64) em vez do DataFrame float64
+        arr = self.load_array(exchange_id, symbol, timeframe)
+        if limit:
+            arr = arr[-limit:]
+        return frame_from_array(arr, compact)
+
+    def timeframes(self, exchange_id, symbol):
+        # Timeframes já salvos para o símbolo
+        directory = os.path.dirname(self._path(exchange_id, symbol, 'x'))
+        if not os.path.isdir(directory):
+            return []
+        return [name[:-4] for name in os.listdir(directory)
+                if name.endswith('.npy') and not name.endswith('.tmp.npy')]
+
+    def bounds(self, exchange_id, symbol, timeframe):
+        # (primeiro, último) timestamp em ms, ou (None, None) se vazio
+        arr = self.load_array(exchange_id, symbol, timeframe)
+        if len(arr) == 0:
+            return None, None
+        return int(arr['timestamp'][0]), int(arr['timestamp'][-1])
+
+    def merge(self, exchange_id, symbol, timeframe, ohlcv):
+        """
+        Mescla candles no formato bruto do ccxt ([ts, o, h, l, c, v], ...) com o
+        que já está salvo. Barras repetidas são deduplicadas pelo timestamp,
+        prevalecendo a mais nova (o candle em formação é atualizado).
+        Candles a partir do último salvo (a sincronização normal) são gravados no
+        fim do arquivo; só barras mais antigas (backfill) reescrevem o histórico.
+        Retorna quantas barras novas foram adicionadas.
+        """
+        if len(ohlcv) == 0:
+            return 0
+        new = _dedup(np.array([tuple(row) for row in ohlcv], dtype=OHLCV_DTYPE))
+        path = self._path(exchange_id, symbol, timeframe)
+        with self._lock(path):
+            old = self.load_array(exchange_id, symbol, timeframe)
+            if len(old) and new['timestamp'][0] >= old['timestamp'][-1]:
+                start = len(old) - 1 if new['timestamp'][0] == old['timestamp'][-1] else len(old)
+                n_old = len(old)
+                del old  # fecha o memory-map antes de gravar
+                if _write_tail(path, start, new):
+                    return start + len(new) - n_old
+                old = self.load_array(exchange_id, symbol, timeframe)
+
+            merged = _dedup(np.concatenate([old, new]))
+            n_old = len(old)
+            del old
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Arquivo temporário único no mesmo diretório e troca atômica
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp.npy')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, merged)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            return len(merged) - n_old
+
+def _dedup(arr):
+    # Ordena de forma estável e mantém a última ocorrência de cada timestamp
+    arr = arr[np.argsort(arr['timestamp'], kind='stable')]
+    keep = np.ones(len(arr), dtype=bool)
+    keep[:-1] = arr['timestamp'][1:] != arr['timestamp'][:-1]
+    return arr[keep]
+
+def _write_tail(path, start, rows):
+    """
+    Grava `rows` a partir da linha `start` de um .npy existente, sem reescrever o
+    resto: primeiro os dados, depois o cabeçalho com o novo tamanho. Retorna False
+    se o cabeçalho não couber no espaço atual (aí quem chamou reescreve o arquivo).
+    """
+    fmt = np.lib.format
+    with open(path, 'r+b') as f:
+        if fmt.read_magic(f) != (1, 0):
+            return False
+        (length,), _, dtype = fmt.read_array_header_1_0(f)
+        header_len = f.tell()
+        if dtype != OHLCV_DTYPE:
+            return False
+        header = io.BytesIO()
+        fmt.write_array_header_1_0(header, {'descr': fmt.dtype_to_descr(OHLCV_DTYPE), 'fortran_order': False,
+                                            'shape': (start + len(rows),)})
+        if len(header.getvalue()) != header_len or start > length:
+            return False
+        f.seek(header_len + start * OHLCV_DTYPE.itemsize)
+        f.write(rows.tobytes())
+        f.truncate()
+        f.seek(0)
+        f.write(header.getvalue())
+    return True
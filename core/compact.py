@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from core.indicators import INDICATORS
+
+OHLCV_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+class CompactOHLCV:
+    """
+    Modo compacto (opcional) para históricos longos ou muitos símbolos: OHLCV num
+    único bloco float32 contíguo, timestamps em int64 (ms epoch) e indicadores
+    calculados só quando pedidos, guardados também em float32.
+    Os indicadores são calculados em float64 a partir do OHLCV e só o resultado é
+    reduzido, então as estratégias ficam dentro da tolerância do caminho float64.
+    `df[col]` devolve uma Series sem cópia, o que basta para StrategyEngine
+    (ma_cross_signals, ma_stoch_signals) e run_backtest_signals.
+    """
+    def __init__(self, timestamp, values):
+        # timestamp: int64 (n,) em ms; values: float32 (5, n), uma linha por campo de OHLCV_FIELDS
+        self.timestamp = np.ascontiguousarray(timestamp, dtype=np.int64)
+        self.values = np.ascontiguousarray(values, dtype=np.float32)
+        self._features = {}  # Feature -> {coluna: array float32}
+
+    @classmethod
+    def from_frame(cls, df):
+        timestamp = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+        values = np.vstack([df[field].to_numpy(dtype=np.float32) for field in OHLCV_FIELDS])
+        return cls(timestamp, values)
+
+    @classmethod
+    def from_array(cls, arr):
+        # Array estruturado do CandleStore (timestamp em ms + OHLCV)
+        return cls(arr['timestamp'], np.vstack([arr[field] for field in OHLCV_FIELDS]))
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def index(self):
+        return pd.RangeIndex(len(self))
+
+    @property
+    def columns(self):
+        names = ['timestamp', *OHLCV_FIELDS]
+        for columns in self._features.values():
+            names.extend(columns)
+        return names
+
+    def __getitem__(self, name):
+        if name == 'timestamp':
+            return pd.Series(self.timestamp.view('datetime64[ms]'), name=name, copy=False)
+        if name in OHLCV_FIELDS:
+            return pd.Series(self.values[OHLCV_FIELDS.index(name)], name=name, copy=False)
+        for columns in self._features.values():
+            if name in columns:
+                return pd.Series(columns[name], name=name, copy=False)
+        raise KeyError(f"{name} (indicadores precisam ser pedidos antes com features())")
+
+    def _float64_frame(self, fields):
+        # Cópia temporária em float64, descartada após calcular os indicadores
+        return pd.DataFrame({field: self.values[OHLCV_FIELDS.index(field)].astype(np.float64)
+                             for field in fields})
+
+    def features(self, *features):
+        """Calcula (uma vez) e devolve {coluna: array float32} das features pedidas."""
+        missing = [f for f in dict.fromkeys(features) if f not in self._features]
+        if missing:
+            df = self._float64_frame(OHLCV_FIELDS)
+            for feature in missing:
+                columns = INDICATORS[feature.kind](df, *feature.params)
+                self._features[feature] = {name: series.to_numpy(dtype=np.float32)
+                                           for name, series in columns.items()}
+        out = {}
+        for feature in features:
+            out.update(self._features[feature])
+        return out
+
+    def drop_features(self):
+        self._features.clear()
+
+    def frame(self):
+        """DataFrame (float32) com OHLCV e os indicadores já calculados, para código legado."""
+        return pd.DataFrame({name: self[name] for name in self.columns})
+
+    @property
+    def nbytes(self):
+        feature_bytes = sum(a.nbytes for columns in self._features.values() for a in columns.values())
+        return self.timestamp.nbytes + self.values.nbytes + feature_bytes
+
+    def memory_report(self):
+        """Memória do modo compacto vs o mesmo conteúdo num DataFrame float64."""
+        n_columns = len(self.columns)
+        float64_bytes = len(self) * 8 * n_columns
+        return {
+            'bars': len(self),
+            'columns': n_columns,
+            'compact_mib': self.nbytes / 2**20,
+            'float64_mib': float64_bytes / 2**20,
+            'reduction %': (1 - self.nbytes / float64_bytes) * 100 if float64_bytes else 0.0,
+        }
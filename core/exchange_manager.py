@@ -1,13 +1,56 @@
+import logging
+import threading
+import time
 import ccxt
+from ccxt.base.decimal_to_precision import decimal_to_precision, TRUNCATE, ROUND, TICK_SIZE, NO_PADDING
 import pandas as pd
 import streamlit as st
+from core.compact import CompactOHLCV
+from core.candle_store import frame_from_array
+from core.resample import can_resample, resample_array, timeframe_ms
+
+logger = logging.getLogger(__name__)
+
+def ohlcv_to_frame(ohlcv):
+    # Converte a lista bruta do ccxt ([ts, o, h, l, c, v], ...) no DataFrame usado pelo app
+    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
 
 class ExchangeManager:
-    def __init__(self, exchange_id, api_key=None, secret=None, testnet=False, market_type='swap'):
+    # Máximo de candles pedidos por requisição ao paginar o histórico
+    page_limit = 1000
+    # Máximo de barras do timeframe base para montar um timeframe maior localmente
+    derive_max_bars = 50_000
+    # Validade (s) da tabela de mercados e do saldo em cache
+    markets_ttl = 3600
+    balance_ttl = 10
+    # Intervalo (s) entre tentativas de carregar os mercados após uma falha
+    markets_retry = 60
+
+    def __init__(self, exchange_id, api_key=None, secret=None, testnet=False, market_type='swap', store=None,
+                 exchange=None):
         self.exchange_id = exchange_id
         self.testnet = testnet
         self.market_type = market_type
-        self.exchange = self._initialize_exchange(api_key, secret)
+        # CandleStore opcional: se definido, fetch_ohlcv baixa apenas os candles que faltam
+        self.store = store
+        # `exchange` permite injetar um cliente (ex.: exchange simulada) no lugar do ccxt real
+        self.exchange = exchange or self._initialize_exchange(api_key, secret)
+        self._markets = None
+        self._markets_at = 0.0
+        self._markets_tried_at = 0.0
+        self._markets_thread = None
+        self._balance = None
+        self._balance_at = 0.0
+        if self.exchange is not None:
+            # Carrega os mercados fora do caminho das ordens
+            self.preload_markets()
+
+    @property
+    def store_key(self):
+        key = f"{self.exchange_id}_{self.market_type}"
+        return key + "_testnet" if self.testnet else key
 
     def _initialize_exchange(self, api_key, secret):
         try:
@@ -39,16 +82,23 @@ class ExchangeManager:
             st.error(f"Erro ao inicializar exchange {self.exchange_id}: {str(e)}")
             return None
 
-    def fetch_ohlcv(self, symbol, timeframe, limit=1000):
+    def fetch_ohlcv(self, symbol, timeframe, limit=1000, compact=False):
+        # compact=True: CompactOHLCV (float32, indicadores sob demanda) em vez do DataFrame float64
         if not self.exchange:
             return pd.DataFrame()
 
         try:
+            if self.store is not None:
+                base_tf = self.derivable_from(symbol, timeframe, limit)
+                if base_tf is not None:
+                    return self.derive_ohlcv(symbol, base_tf, timeframe, limit, compact)
+                self.sync_ohlcv(symbol, timeframe, limit)
+                return self.store.load(self.store_key, symbol, timeframe, limit, compact=compact)
+
             # Tenta baixar dados
             ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            return df
+            df = ohlcv_to_frame(ohlcv)
+            return CompactOHLCV.from_frame(df) if compact else df
         except ccxt.NetworkError as e:
             st.error(f"Erro de Rede (Bloqueio de IP ou Falha): {str(e)}")
             return pd.DataFrame()
@@ -59,22 +109,193 @@ class ExchangeManager:
             st.error(f"Erro desconhecido ao baixar dados: {str(e)}")
             return pd.DataFrame()
 
-    def get_balance(self):
+    def sync_ohlcv(self, symbol, timeframe, limit=1000):
+        """
+        Atualiza o CandleStore: baixa só a cauda desde o último candle salvo e,
+        se houver menos de `limit` barras, completa o histórico para trás.
+        Erros do ccxt sobem para quem chamou.
+        """
+        page = min(limit, self.page_limit)
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        _, last = self.store.bounds(self.store_key, symbol, timeframe)
+
+        if last is None:
+            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=page)
+            self.store.merge(self.store_key, symbol, timeframe, ohlcv)
+        else:
+            # Começa no último candle salvo: ele pode ainda estar em formação
+            since = last
+            while True:
+                ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=page)
+                self.store.merge(self.store_key, symbol, timeframe, ohlcv)
+                if len(ohlcv) < page or ohlcv[-1][0] < since + tf_ms:
+                    break
+                since = ohlcv[-1][0] + tf_ms
+
+        stored = len(self.store.load_array(self.store_key, symbol, timeframe))
+        if stored < limit:
+            self.backfill_ohlcv(symbol, timeframe, limit - stored)
+
+    def derivable_from(self, symbol, timeframe, limit):
+        """
+        Timeframe menor já salvo no CandleStore de onde montar `limit` candles de
+        `timeframe` localmente (o maior deles, que tem menos barras para agregar), ou
+        None se for preciso baixar o timeframe pedido. O base só entra se precisar de
+        até `derive_max_bars` barras; o histórico que faltar é completado para trás
+        em derive_ohlcv, então trocar de timeframe não baixa a série pedida de novo.
+        """
+        best = None
+        for base_tf in self.store.timeframes(self.store_key, symbol):
+            if base_tf == timeframe or base_tf.endswith('M') or not can_resample(base_tf, timeframe):
+                continue
+            ratio = timeframe_ms(timeframe) // timeframe_ms(base_tf)
+            if (limit + 1) * ratio > self.derive_max_bars:
+                continue
+            if best is None or timeframe_ms(base_tf) > timeframe_ms(best):
+                best = base_tf
+        return best
+
+    def derive_ohlcv(self, symbol, base_tf, timeframe, limit=1000, compact=False):
+        # Atualiza a cauda do timeframe base (e completa o histórico para trás se faltar)
+        # e agrega localmente; o último candle fica em formação
+        ratio = timeframe_ms(timeframe) // timeframe_ms(base_tf)
+        needed = (limit + 1) * ratio
+        self.sync_ohlcv(symbol, base_tf, needed)
+        arr = self.store.load_array(self.store_key, symbol, base_tf)[-needed:]
+        return frame_from_array(resample_array(arr, base_tf, timeframe)[-limit:], compact)
+
+    def backfill_ohlcv(self, symbol, timeframe, bars):
+        # Pagina para trás com `since` até ter `bars` candles a mais ou a exchange parar de devolver dados
+        page = self.page_limit
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        first, _ = self.store.bounds(self.store_key, symbol, timeframe)
+        if first is None:
+            return
+        target = first - bars * tf_ms
+
+        while first > target:
+            since = max(target, first - page * tf_ms)
+            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=page)
+            added = self.store.merge(self.store_key, symbol, timeframe, ohlcv)
+            if added == 0:
+                break
+            first, _ = self.store.bounds(self.store_key, symbol, timeframe)
+
+    def preload_markets(self):
+        """Carrega a tabela de mercados numa thread, sem bloquear; devolve a thread."""
+        if self._markets_thread is None or not self._markets_thread.is_alive():
+            self._markets_tried_at = time.monotonic()
+            self._markets_thread = threading.Thread(target=self._refresh_markets_quietly, daemon=True)
+            self._markets_thread.start()
+        return self._markets_thread
+
+    def load_markets(self, reload=False):
+        """
+        Tabela de mercados (precisão e limites) em cache, ou None enquanto não
+        carregou. Nunca bloqueia: a carga começa em __init__ e as atualizações
+        (`reload`, tabela vencida pelo `markets_ttl` ou nova tentativa após falha,
+        no máximo a cada `markets_retry`) rodam numa thread; a tabela antiga
+        continua valendo até ela terminar.
+        """
+        now = time.monotonic()
+        stale = self._markets is None or now - self._markets_at > self.markets_ttl
+        if reload or (stale and now - self._markets_tried_at > self.markets_retry):
+            self.preload_markets()
+        return self._markets
+
+    def _refresh_markets(self):
+        if hasattr(self.exchange, 'load_markets'):
+            markets = self.exchange.load_markets(reload=True)
+        else:
+            markets = {}  # cliente sem metadados (ex.: exchange simulada): sem validação local
+        self._markets = markets
+        self._markets_at = time.monotonic()
+
+    def _refresh_markets_quietly(self):
+        try:
+            self._refresh_markets()
+        except Exception as e:
+            # Mantém a tabela antiga (ou nenhuma); nova tentativa depois de markets_retry
+            logger.warning("Não foi possível carregar os mercados de %s: %s", self.exchange_id, e)
+
+    def market(self, symbol):
+        markets = self.load_markets()
+        return None if markets is None else markets.get(symbol)
+
+    def prepare_order(self, symbol, amount, price=None):
+        """
+        Arredonda quantidade (para baixo) e preço à precisão do mercado e confere os
+        limites de quantidade e de valor mínimo (notional) localmente, sem rede.
+        Em ordens a mercado, `price` é só a referência para o notional.
+        Levanta ccxt.InvalidOrder se a exchange fosse rejeitar a ordem. Sem os metadados
+        do mercado (ainda carregando ou indisponíveis), a ordem segue sem validação local.
+        """
+        markets = self.load_markets()
+        if markets is None:
+            logger.warning("Mercados ainda não carregados: ordem de %s enviada sem validação local", symbol)
+            return amount, price
+        market = markets.get(symbol)
+        if market is None:
+            return amount, price
+        mode = getattr(self.exchange, 'precisionMode', TICK_SIZE)
+        precision = market.get('precision') or {}
+        limits = market.get('limits') or {}
+
+        if precision.get('amount') is not None:
+            amount = float(decimal_to_precision(amount, TRUNCATE, precision['amount'], mode, NO_PADDING))
+        if price is not None and precision.get('price') is not None:
+            price = float(decimal_to_precision(price, ROUND, precision['price'], mode, NO_PADDING))
+
+        amount_limits = limits.get('amount') or {}
+        min_amount = amount_limits.get('min') or 0
+        if amount <= 0 or amount < min_amount:
+            raise ccxt.InvalidOrder(f"Quantidade {amount} abaixo do mínimo de {symbol} ({min_amount})")
+        if amount_limits.get('max') and amount > amount_limits['max']:
+            raise ccxt.InvalidOrder(f"Quantidade {amount} acima do máximo de {symbol} ({amount_limits['max']})")
+
+        min_cost = (limits.get('cost') or {}).get('min')
+        if min_cost and price is not None:
+            cost = amount * price * (market.get('contractSize') or 1)
+            if cost < min_cost:
+                raise ccxt.InvalidOrder(f"Valor da ordem {cost:.4f} abaixo do mínimo de {symbol} ({min_cost})")
+        return amount, price
+
+    def get_balance(self, max_age=None):
+        # Saldo em cache por `balance_ttl` segundos; invalidado após cada ordem executada
         if not self.exchange: return None
+        max_age = self.balance_ttl if max_age is None else max_age
+        if self._balance is not None and time.monotonic() - self._balance_at < max_age:
+            return self._balance
         try:
             balance = self.exchange.fetch_balance()
+            self._balance = balance
+            self._balance_at = time.monotonic()
             return balance
         except Exception as e:
             st.warning(f"Não foi possível ler o saldo (Verifique permissões ou IP): {str(e)}")
             return None
 
-    def create_order(self, symbol, side, amount, price=None, order_type='market'):
+    def invalidate_balance(self):
+        self._balance = None
+
+    def create_order(self, symbol, side, amount, price=None, order_type='market', ref_price=None):
+        """
+        Envia a ordem depois de arredondar e validar localmente (prepare_order), então
+        ordens que a exchange recusaria não gastam uma requisição. `ref_price` (ex.: último
+        close) permite checar o notional mínimo de ordens a mercado.
+        """
         if not self.exchange: return None
         try:
             if order_type == 'market':
-                return self.exchange.create_market_order(symbol, side, amount)
+                amount, _ = self.prepare_order(symbol, amount, ref_price)
+                order = self.exchange.create_market_order(symbol, side, amount)
             elif order_type == 'limit':
-                return self.exchange.create_limit_order(symbol, side, amount, price)
+                amount, price = self.prepare_order(symbol, amount, price)
+                order = self.exchange.create_limit_order(symbol, side, amount, price)
+            else:
+                return None
+            self.invalidate_balance()
+            return order
         except Exception as e:
             st.error(f"Erro na ordem: {str(e)}")
             return None
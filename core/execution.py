@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+import uuid
+import numpy as np
+import ccxt
+
+logger = logging.getLogger(__name__)
+
+class LatencyHistogram:
+    """Histograma de latências (segundos) com buckets logarítmicos fixos."""
+    # Limites superiores dos buckets: 1 ms a ~65 s
+    bounds = 0.001 * 2.0 ** np.arange(17)
+
+    def __init__(self):
+        self.counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.samples = []
+
+    def record(self, seconds):
+        self.counts[np.searchsorted(self.bounds, seconds)] += 1
+        self.samples.append(seconds)
+
+    def percentile(self, q):
+        return float(np.percentile(self.samples, q)) if self.samples else float('nan')
+
+    def summary(self):
+        return {'count': len(self.samples), 'p50': self.percentile(50),
+                'p90': self.percentile(90), 'p99': self.percentile(99)}
+
+class ExecutionService:
+    """
+    Camada de execução assíncrona e independente do Streamlit, para uso em bots.
+    - Cada ordem leva um clientOrderId (chave de idempotência): reenviar a mesma
+      chave devolve a ordem já registrada em vez de duplicar.
+    - Falhas de rede são repetidas com backoff; antes de reenviar, consulta a
+      exchange para saber se a ordem chegou (ack perdido) e evita ordem dupla.
+    - Registra latências submit->ack e submit->fill e reconcilia ordens abertas.
+    `exchange` é um cliente ccxt assíncrono (ccxt.async_support / ccxt.pro) ou SimulatedExchange.
+    """
+    def __init__(self, exchange, max_retries=3, backoff=0.2, max_concurrency=8):
+        self.exchange = exchange
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self.orders = {}          # clientOrderId -> ordem (formato ccxt)
+        self._pending = {}        # clientOrderId -> Future da submissão em andamento
+        self._submitted_at = {}   # clientOrderId -> perf_counter do envio
+        self.ack_latency = LatencyHistogram()
+        self.fill_latency = LatencyHistogram()
+
+    @staticmethod
+    def new_client_order_id(prefix='bot'):
+        return f"{prefix}-{uuid.uuid4().hex[:20]}"
+
+    async def _find_order(self, client_id, symbol):
+        # Procura na exchange uma ordem enviada com este clientOrderId (ack perdido na rede).
+        # Se a consulta também falhar, o reenvio continua seguro: a exchange recusa o
+        # clientOrderId repetido (DuplicateOrderId) e a ordem é buscada de novo.
+        try:
+            return await self.exchange.fetch_order(None, symbol, {'clientOrderId': client_id})
+        except (ccxt.OrderNotFound, ccxt.NotSupported, ccxt.NetworkError):
+            return None
+
+    async def _submit(self, client_id, symbol, side, amount, price, order_type, params):
+        params = dict(params or {}, clientOrderId=client_id)
+        self._submitted_at[client_id] = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                order = await self.exchange.create_order(symbol, order_type, side, amount, price, params)
+                break
+            except ccxt.DuplicateOrderId:
+                # A tentativa anterior chegou à exchange: usa a ordem existente
+                order = await self._find_order(client_id, symbol)
+                if order is None:
+                    raise
+                break
+            except ccxt.NetworkError as e:
+                order = await self._find_order(client_id, symbol)
+                if order is not None:
+                    break
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning("Falha de rede ao enviar %s (%s), nova tentativa em %.2fs", client_id, e, delay)
+                await asyncio.sleep(delay)
+
+        self.ack_latency.record(time.perf_counter() - self._submitted_at[client_id])
+        self._track(client_id, order)
+        return order
+
+    def _track(self, client_id, order):
+        previous = self.orders.get(client_id)
+        self.orders[client_id] = order
+        was_filled = previous is not None and previous.get('status') == 'closed'
+        if order.get('status') == 'closed' and not was_filled:
+            self.fill_latency.record(time.perf_counter() - self._submitted_at[client_id])
+
+    async def submit(self, symbol, side, amount, price=None, order_type='market', client_order_id=None, params=None):
+        """
+        Envia uma ordem e devolve a resposta da exchange. Chamadas repetidas com o
+        mesmo `client_order_id` (inclusive concorrentes) resultam numa única ordem.
+        """
+        client_id = client_order_id or self.new_client_order_id()
+        if client_id in self.orders:
+            return self.orders[client_id]
+        if client_id not in self._pending:
+            self._pending[client_id] = asyncio.ensure_future(
+                self._submit(client_id, symbol, side, amount, price, order_type, params))
+        try:
+            return await asyncio.shield(self._pending[client_id])
+        finally:
+            if self._pending.get(client_id) is not None and self._pending[client_id].done():
+                self._pending.pop(client_id, None)
+
+    async def submit_many(self, orders):
+        """
+        Envia várias ordens em paralelo (no máximo `max_concurrency` por vez).
+        `orders` é uma lista de dicts com os argumentos de submit.
+        Falhas voltam como exceção na posição correspondente.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(kwargs):
+            async with semaphore:
+                return await self.submit(**kwargs)
+
+        return await asyncio.gather(*(one(o) for o in orders), return_exceptions=True)
+
+    async def reconcile(self):
+        """Atualiza as ordens ainda abertas e registra a latência de preenchimento."""
+        open_ids = [cid for cid, o in self.orders.items() if o.get('status') == 'open']
+        for client_id in open_ids:
+            order = self.orders[client_id]
+            try:
+                updated = await self.exchange.fetch_order(order['id'], order['symbol'])
+            except ccxt.NetworkError as e:
+                logger.warning("Não foi possível reconciliar %s: %s", client_id, e)
+                continue
+            self._track(client_id, updated)
+        return {cid: self.orders[cid] for cid in open_ids}
+
+    def latency_report(self):
+        return {'submit->ack': self.ack_latency.summary(), 'submit->fill': self.fill_latency.summary()}
@@ -1,50 +1,141 @@
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler
+import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import GRU, Dense, Dropout
 import streamlit as st
 
 class GRUModel:
-    def __init__(self, lookback=60):
+    def __init__(self, lookback=60, features=None):
         self.lookback = lookback
+        # Colunas usadas como canais de entrada; None = apenas a coluna alvo
+        self.features = features
         self.model = None
+        # `scaler` normaliza a coluna alvo (usado no inverse_transform das previsões)
         self.scaler = MinMaxScaler(feature_range=(0, 1))
+        self.feature_scaler = MinMaxScaler(feature_range=(0, 1))
+        # Grafo de inferência (tf.function) e o modelo para o qual foi montado
+        self._compiled_fn = None
+        self._compiled_for = None
 
-    def prepare_data(self, df, target_col='close'):
-        data = df[target_col].values.reshape(-1, 1)
-        scaled_data = self.scaler.fit_transform(data)
-        
-        X, y = [], []
-        for i in range(self.lookback, len(scaled_data)):
-            X.append(scaled_data[i-self.lookback:i, 0])
-            y.append(scaled_data[i, 0])
-            
-        X, y = np.array(X), np.array(y)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+    @property
+    def n_features(self):
+        return len(self.features) if self.features else 1
+
+    def _scaled_inputs(self, df, target_col, fit=True):
+        # Normaliza alvo e canais de entrada; linhas com NaN (início dos indicadores) são descartadas.
+        # fit=False reaproveita os scalers já ajustados (ex.: modelo carregado do disco)
+        cols = list(dict.fromkeys([target_col] + list(self.features or [])))
+        data = df[cols].dropna()
+        target = data[[target_col]].to_numpy()
+        scaled_target = self.scaler.fit_transform(target) if fit else self.scaler.transform(target)
+        if not self.features:
+            return scaled_target, scaled_target
+        values = data[self.features].to_numpy()
+        scaled_features = self.feature_scaler.fit_transform(values) if fit else self.feature_scaler.transform(values)
+        return scaled_features, scaled_target
+
+    def prepare_data(self, df, target_col='close', fit=True):
+        """
+        Monta as janelas (n, lookback, canais) com sliding_window_view: X é uma view
+        sobre os dados normalizados, sem copiar cada janela.
+        """
+        inputs, scaled_data = self._scaled_inputs(df, target_col, fit)
+
+        # windows[i] = inputs[i:i+lookback]; a última janela não tem alvo
+        windows = sliding_window_view(inputs, self.lookback, axis=0)[:-1]
+        X = windows.transpose(0, 2, 1)
+        y = scaled_data[self.lookback:, 0]
         return X, y, scaled_data
 
+    def make_dataset(self, df, target_col='close', batch_size=32, start=None, end=None, shuffle=False, fit=True):
+        """
+        Pipeline tf.data com janelas geradas por lote e prefetch, sem materializar
+        o tensor (n, lookback, canais). `start`/`end` recortam pelo índice da janela
+        (ex.: split treino/teste).
+        """
+        inputs, scaled_data = self._scaled_inputs(df, target_col, fit)
+        n_windows = len(inputs) - self.lookback
+        start = start or 0
+        end = n_windows if end is None else min(end, n_windows)
+
+        inputs = tf.constant(inputs, dtype=tf.float32)
+        targets = tf.constant(scaled_data[:, 0], dtype=tf.float32)
+        offsets = tf.range(self.lookback, dtype=tf.int64)
+
+        def gather_batch(idx):
+            # idx: inícios das janelas do lote -> (lote, lookback, canais) montado só aqui
+            return tf.gather(inputs, idx[:, None] + offsets), tf.gather(targets, idx + self.lookback)
+
+        dataset = tf.data.Dataset.range(start, end)
+        if shuffle:
+            dataset = dataset.shuffle(end - start)
+        dataset = dataset.batch(batch_size).map(gather_batch, num_parallel_calls=tf.data.AUTOTUNE)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
     def build_model(self, units=50, dropout=0.2, layers=2):
         model = Sequential()
         # Camada de entrada
-        model.add(GRU(units=units, return_sequences=(layers > 1), input_shape=(self.lookback, 1)))
+        model.add(GRU(units=units, return_sequences=(layers > 1), input_shape=(self.lookback, self.n_features)))
         model.add(Dropout(dropout))
-        
+
         # Camadas ocultas
         for i in range(1, layers):
             return_seq = (i < layers - 1)
             model.add(GRU(units=units, return_sequences=return_seq))
             model.add(Dropout(dropout))
-            
+
         # Saída
         model.add(Dense(units=1))
         model.compile(optimizer='adam', loss='mean_squared_error')
         self.model = model
         return model
 
-    def train(self, X_train, y_train, epochs=10, batch_size=32):
+    def train(self, X_train, y_train=None, epochs=10, batch_size=32):
+        # Aceita arrays (X, y) ou um tf.data.Dataset de make_dataset (y_train=None)
+        if y_train is None:
+            return self.model.fit(X_train, epochs=epochs, verbose=0)
         history = self.model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, verbose=0)
         return history
 
-    def predict(self, X):
-        return self.model.predict(X)
+    def _inference_fn(self, compiled=True):
+        # Chamada direta ao modelo (sem o laço do model.predict); com `compiled` vira um grafo
+        # tf.function com assinatura fixa, compilado uma vez e reaproveitado em todos os lotes
+        if not compiled:
+            return lambda x: self.model(x, training=False)
+        if self._compiled_for is not self.model:
+            spec = tf.TensorSpec((None, self.lookback, self.n_features), tf.float32)
+            self._compiled_fn = tf.function(lambda x: self.model(x, training=False), input_signature=[spec])
+            self._compiled_for = self.model
+        return self._compiled_fn
+
+    def predict(self, X, batch_size=4096, compiled=True):
+        """Previsões normalizadas (n, 1) para as janelas X, em lotes grandes."""
+        fn = self._inference_fn(compiled)
+        out = np.empty((len(X), 1), dtype=np.float32)
+        with tf.device('/CPU:0'):
+            for i in range(0, len(X), batch_size):
+                batch = np.ascontiguousarray(X[i:i + batch_size], dtype=np.float32)
+                out[i:i + len(batch)] = fn(tf.constant(batch)).numpy()
+        return out
+
+    def predict_next_close(self, df, target_col='close', batch_size=4096, compiled=True):
+        """
+        Previsão (em preço) do próximo fechamento para cada candle de `df`, numa única
+        inferência em lote sobre todas as janelas, inclusive a que termina no último candle.
+        Alinhada às linhas de `df`: NaN onde ainda não há `lookback` candles válidos.
+        Usa os scalers já ajustados (fit=False).
+        """
+        cols = list(dict.fromkeys([target_col] + list(self.features or [])))
+        rows = np.flatnonzero(df[cols].notna().all(axis=1).to_numpy())
+        inputs, _ = self._scaled_inputs(df, target_col, fit=False)
+
+        out = np.full(len(df), np.nan)
+        if len(inputs) < self.lookback:
+            return out
+        X = sliding_window_view(inputs, self.lookback, axis=0).transpose(0, 2, 1)
+        predicted = self.scaler.inverse_transform(self.predict(X, batch_size, compiled))[:, 0]
+        out[rows[self.lookback - 1:]] = predicted
+        return out
@@ -1,40 +1,181 @@
+import hashlib
+import weakref
+from collections import OrderedDict, namedtuple
+import numpy as np
 import pandas as pd
 import ta
 
-def add_indicators(df):
+# --- Registro de indicadores ---
+# Cada indicador é declarado como Feature(kind, params). O resolver calcula cada
+# Feature única uma vez e guarda o resultado num cache compartilhado, indexado
+# pela versão dos dados e pelos parâmetros.
+
+Feature = namedtuple('Feature', ['kind', 'params'])
+
+INDICATORS = {}
+
+def register_indicator(kind):
+    def decorator(fn):
+        INDICATORS[kind] = fn
+        return fn
+    return decorator
+
+def SMA(window, source='close'):
+    return Feature('SMA', (source, window))
+
+def RSI(window=14):
+    return Feature('RSI', (window,))
+
+def MACD(fast=12, slow=26, signal=9):
+    return Feature('MACD', (fast, slow, signal))
+
+def STOCH(window=14, smooth=3):
+    return Feature('STOCH', (window, smooth))
+
+def BBANDS(window=20, dev=2.0):
+    return Feature('BBANDS', (window, float(dev)))
+
+def ATR(window=14):
+    return Feature('ATR', (window,))
+
+@register_indicator('SMA')
+def _sma(df, source, window):
+    name = f'SMA_{window}' if source == 'close' else f'SMA_{source}_{window}'
+    return {name: ta.trend.SMAIndicator(close=df[source], window=window).sma_indicator()}
+
+@register_indicator('RSI')
+def _rsi(df, window):
+    return {f'RSI_{window}': ta.momentum.RSIIndicator(close=df['close'], window=window).rsi()}
+
+@register_indicator('MACD')
+def _macd(df, fast, slow, signal):
+    macd = ta.trend.MACD(close=df['close'], window_fast=fast, window_slow=slow, window_sign=signal)
+    suffix = f'{fast}_{slow}_{signal}'
+    return {
+        f'MACD_{suffix}': macd.macd(),
+        f'MACDh_{suffix}': macd.macd_diff(),
+        f'MACDs_{suffix}': macd.macd_signal(),
+    }
+
+@register_indicator('STOCH')
+def _stoch(df, window, smooth):
+    stoch = ta.momentum.StochasticOscillator(high=df['high'], low=df['low'], close=df['close'],
+                                             window=window, smooth_window=smooth)
+    suffix = f'{window}_{smooth}_{smooth}'
+    return {f'STOCHk_{suffix}': stoch.stoch(), f'STOCHd_{suffix}': stoch.stoch_signal()}
+
+@register_indicator('BBANDS')
+def _bbands(df, window, dev):
+    bb = ta.volatility.BollingerBands(close=df['close'], window=window, window_dev=dev)
+    suffix = f'{window}_{dev}'
+    return {
+        f'BBL_{suffix}': bb.bollinger_lband(),
+        f'BBM_{suffix}': bb.bollinger_mavg(),
+        f'BBU_{suffix}': bb.bollinger_hband(),
+    }
+
+@register_indicator('ATR')
+def _atr(df, window):
+    atr = ta.volatility.AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=window)
+    # Mantém o nome histórico 'ATR' para a janela padrão
+    return {'ATR' if window == 14 else f'ATR_{window}': atr.average_true_range()}
+
+# Colunas que os indicadores leem; a versão dos dados é um hash do conteúdo delas
+SOURCE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# id(df) -> (chave rápida, versão). Evita refazer o hash a cada estratégia/trial sobre o
+# mesmo DataFrame; a entrada some quando o DataFrame é coletado
+_VERSION_MEMO = {}
+
+def _quick_key(df):
+    # Detecta candles novos ou o último atualizado no mesmo objeto sem ler a série inteira
+    if df.empty:
+        return (0,)
+    return (len(df), df['timestamp'].iloc[0], df['timestamp'].iloc[-1], float(df['close'].iloc[-1]))
+
+def data_version(df):
+    """
+    Impressão digital do conteúdo OHLCV (hash das colunas inteiras, não só das pontas).
+    O hash é memorizado por objeto: alterar valores no meio de um DataFrame já usado,
+    in-place, exige um DataFrame novo (ou FEATURE_CACHE.clear()).
+    """
+    quick = _quick_key(df)
+    memo = _VERSION_MEMO.get(id(df))
+    if memo is not None and memo[0] == quick:
+        return memo[1]
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(len(df)).encode())
+    for col in SOURCE_COLUMNS:
+        if col in df:
+            h.update(col.encode())
+            h.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).data)
+    version = h.hexdigest()
+
+    if memo is None:
+        weakref.finalize(df, _VERSION_MEMO.pop, id(df), None)
+    _VERSION_MEMO[id(df)] = (quick, version)
+    return version
+
+class FeatureCache:
+    """Cache LRU de features calculadas, indexado por (versão dos dados, Feature)."""
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self._items = OrderedDict()
+
+    def get(self, key):
+        if key in self._items:
+            self._items.move_to_end(key)
+            return self._items[key]
+        return None
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+# Cache padrão compartilhado entre estratégias e trials do otimizador
+FEATURE_CACHE = FeatureCache()
+
+def compute_features(df, features, cache=FEATURE_CACHE):
+    """
+    Calcula as features pedidas (sem repetir) e devolve {coluna: array}, alinhado por
+    posição às linhas de `df` (o cache não guarda índice, então serve a qualquer
+    DataFrame com o mesmo conteúdo). Não altera o DataFrame de entrada.
+    """
+    version = data_version(df)
+    out = {}
+    for feature in dict.fromkeys(features):
+        key = (version, feature)
+        columns = cache.get(key) if cache is not None else None
+        if columns is None:
+            columns = {name: series.to_numpy(dtype=np.float64)
+                       for name, series in INDICATORS[feature.kind](df, *feature.params).items()}
+            if cache is not None:
+                cache.put(key, columns)
+        out.update(columns)
+    return out
+
+# Conjunto completo calculado historicamente pelo add_indicators
+DEFAULT_FEATURES = (
+    SMA(7), SMA(14), SMA(25), SMA(50), SMA(200),
+    RSI(14),
+    MACD(12, 26, 9),
+    STOCH(14, 3),
+    BBANDS(20, 2),
+    ATR(14),
+)
+
+def add_indicators(df, features=DEFAULT_FEATURES, cache=FEATURE_CACHE):
     # Verifica se há dados suficientes
     if df.empty:
         return df
 
-    # --- Médias Móveis (SMA) ---
-    # Usando ta.trend.SMAIndicator
-    df['SMA_7'] = ta.trend.SMAIndicator(close=df['close'], window=7).sma_indicator()
-    df['SMA_14'] = ta.trend.SMAIndicator(close=df['close'], window=14).sma_indicator()
-    df['SMA_25'] = ta.trend.SMAIndicator(close=df['close'], window=25).sma_indicator()
-    df['SMA_50'] = ta.trend.SMAIndicator(close=df['close'], window=50).sma_indicator()
-    df['SMA_200'] = ta.trend.SMAIndicator(close=df['close'], window=200).sma_indicator()
-    
-    # --- RSI ---
-    df['RSI_14'] = ta.momentum.RSIIndicator(close=df['close'], window=14).rsi()
-    
-    # --- MACD ---
-    macd = ta.trend.MACD(close=df['close'])
-    df['MACD_12_26_9'] = macd.macd()
-    df['MACDh_12_26_9'] = macd.macd_diff()
-    df['MACDs_12_26_9'] = macd.macd_signal()
-    
-    # --- Estocástico ---
-    stoch = ta.momentum.StochasticOscillator(high=df['high'], low=df['low'], close=df['close'], window=14, smooth_window=3)
-    df['STOCHk_14_3_3'] = stoch.stoch()
-    df['STOCHd_14_3_3'] = stoch.stoch_signal()
-    
-    # --- Bollinger Bands ---
-    bb = ta.volatility.BollingerBands(close=df['close'], window=20, window_dev=2)
-    df['BBL_20_2.0'] = bb.bollinger_lband()
-    df['BBM_20_2.0'] = bb.bollinger_mavg()
-    df['BBU_20_2.0'] = bb.bollinger_hband()
-    
-    # --- ATR (Volatilidade) ---
-    df['ATR'] = ta.volatility.AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=14).average_true_range()
-    
+    for name, values in compute_features(df, features, cache).items():
+        df[name] = values
+
     return df
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+import ccxt
+from core.streaming_indicators import StreamingIndicators
+
+logger = logging.getLogger(__name__)
+
+class LiveRunner:
+    """
+    Loop de execução ao vivo, independente do Streamlit. Recebe candles pelo
+    `feed` (watch_ohlcv do ccxt.pro quando disponível, senão polling de
+    fetch_ohlcv), atualiza indicadores e a estratégia incrementalmente a cada
+    candle fechado e envia ordens pelo `executor` (ExecutionService ou
+    ExchangeManager.create_order).
+    Mesma lógica Long Only do backtest: compra quando flat e sinal 1, vende
+    quando comprado e sinal -1.
+    """
+    def __init__(self, feed, executor, symbol, timeframe, strategy, amount,
+                 poll_interval=None, warmup_bars=300, use_websocket=True):
+        self.feed = feed
+        self.executor = executor
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.strategy = strategy
+        self.amount = amount
+        self.warmup_bars = warmup_bars
+        self.use_websocket = use_websocket and hasattr(feed, 'watch_ohlcv')
+        tf_seconds = feed.parse_timeframe(timeframe)
+        self.tf_ms = tf_seconds * 1000
+        self.poll_interval = poll_interval if poll_interval is not None else max(tf_seconds / 10, 1)
+
+        self.indicators = StreamingIndicators()
+        self.last_indicators = {}
+        self.position = 0
+        self.last_closed_ts = None
+        self._forming = None  # último candle em formação visto (ainda não processado)
+        self.fills = []
+        # Latência de decisão (candle fechado detectado -> ordem confirmada), em segundos
+        self.decision_latency = []
+
+    @staticmethod
+    def _candle(row):
+        ts, o, h, l, c, v = row[:6]
+        return {'timestamp': ts, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+
+    async def warm_up(self):
+        # Alimenta o histórico recente sem enviar ordens; o último candle (em formação) fica de fora
+        ohlcv = await self.feed.fetch_ohlcv(self.symbol, self.timeframe, limit=self.warmup_bars + 1)
+        for row in ohlcv[:-1]:
+            candle = self._candle(row)
+            self.indicators.update(candle['high'], candle['low'], candle['close'])
+            self.strategy.update(candle)
+            self.last_closed_ts = candle['timestamp']
+        if ohlcv:
+            self._forming = ohlcv[-1]
+
+    def _pending(self, ohlcv):
+        # Candles ainda não processados: o em formação guardado mais os da resposta
+        # (para o mesmo timestamp vale a versão mais recente), em ordem
+        rows = {}
+        if self._forming is not None:
+            rows[self._forming[0]] = self._forming
+        for row in ohlcv:
+            rows[row[0]] = row
+        return [rows[ts] for ts in sorted(rows) if self.last_closed_ts is None or ts > self.last_closed_ts]
+
+    async def _fill_gap(self, ohlcv, pending):
+        # Fecharam mais barras do que a resposta traz (poll atrasado, websocket reconectado):
+        # busca o trecho que falta a partir do último candle processado
+        if not pending or self.last_closed_ts is None:
+            return pending
+        timestamps = [self.last_closed_ts] + [row[0] for row in pending]
+        if all(b - a <= self.tf_ms for a, b in zip(timestamps, timestamps[1:])):
+            return pending
+        try:
+            history = await self.feed.fetch_ohlcv(self.symbol, self.timeframe, since=self.last_closed_ts)
+        except Exception as e:
+            logger.warning("Não foi possível buscar os candles que faltam: %s", e)
+            return pending
+        return self._pending([*ohlcv, *history])
+
+    async def stream(self):
+        """
+        Gera cada candle fechado uma única vez, na ordem. Um candle conta como fechado
+        quando chega outro com timestamp maior: com `newUpdates` do ccxt.pro cada
+        resposta do watch_ohlcv costuma trazer só o candle em formação.
+        """
+        while True:
+            try:
+                if self.use_websocket:
+                    ohlcv = await self.feed.watch_ohlcv(self.symbol, self.timeframe)
+                else:
+                    ohlcv = await self.feed.fetch_ohlcv(self.symbol, self.timeframe, limit=3)
+            except Exception as e:
+                if self.use_websocket:
+                    logger.warning("watch_ohlcv falhou (%s), mudando para polling", e)
+                    self.use_websocket = False
+                    continue
+                logger.warning("Falha no polling: %s", e)
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            pending = await self._fill_gap(ohlcv, self._pending(ohlcv))
+            if pending:
+                self._forming = pending[-1]
+            for row in pending[:-1]:
+                candle = self._candle(row)
+                self.last_closed_ts = candle['timestamp']
+                yield candle
+
+            if not self.use_websocket:
+                await asyncio.sleep(self.poll_interval)
+
+    async def on_bar(self, candle):
+        t0 = time.perf_counter()
+        self.last_indicators = self.indicators.update(candle['high'], candle['low'], candle['close'])
+        signal = self.strategy.update(candle)
+
+        side = None
+        if self.position == 0 and signal == 1:
+            side = 'buy'
+        elif self.position == 1 and signal == -1:
+            side = 'sell'
+        if side is None:
+            return None
+
+        try:
+            if hasattr(self.executor, 'submit'):
+                # ExecutionService: envio assíncrono com idempotência e retry
+                order = await self.executor.submit(self.symbol, side, self.amount)
+            else:
+                # ExchangeManager.create_order é síncrono (ccxt): roda numa thread para não travar o stream
+                order = await asyncio.to_thread(self.executor.create_order, self.symbol, side, self.amount)
+        except ccxt.BaseError as e:
+            # Ordem recusada ou rede fora após os retries: mantém a posição e segue o stream
+            logger.warning("Ordem %s %s %s falhou: %s", side, self.amount, self.symbol, e)
+            return None
+        self.decision_latency.append(time.perf_counter() - t0)
+        if order:
+            self.position = 1 if side == 'buy' else 0
+            self.fills.append(order)
+            logger.info("%s %s %s @ %s", side, self.amount, self.symbol, order.get('price'))
+        return order
+
+    async def run(self, max_bars=None):
+        """Executa o loop; `max_bars` encerra após N candles fechados (útil em testes)."""
+        if self.last_closed_ts is None:
+            await self.warm_up()
+        processed = 0
+        async for candle in self.stream():
+            await self.on_bar(candle)
+            processed += 1
+            if max_bars is not None and processed >= max_bars:
+                break
+        return processed
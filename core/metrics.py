@@ -0,0 +1,85 @@
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 24 * 3600  # cripto opera 24/7
+# Janela mínima para anualizar o retorno: abaixo disso o CAGR fica NaN
+# (500 barras de 1m elevariam o retorno a ~1000 e estourariam para inf)
+MIN_CAGR_DAYS = 30
+
+def periods_per_year(timestamps):
+    # Estima quantas barras cabem num ano a partir do intervalo mediano entre candles
+    # (as primeiras 1000 barras bastam e evitam ordenar a série inteira)
+    ts = np.asarray(timestamps[:1001]).astype('datetime64[ns]').astype(np.int64)
+    if len(ts) < 2:
+        return 1.0
+    step = np.median(np.diff(ts)) / 1e9
+    return SECONDS_PER_YEAR / step if step > 0 else 1.0
+
+def compute_metrics(equity, position, initial_capital=1000, timestamps=None, ppy=None,
+                    entries=None, exits=None):
+    """
+    Métricas de desempenho a partir da curva de capital e do array de posição (0/1),
+    tudo em O(n) com NumPy. `ppy` (barras por ano) é inferido dos timestamps se omitido.
+    Métricas de trade (win rate, profit factor, duração) consideram só trades fechados;
+    `entries`/`exits` (índices) podem vir prontos do backtest_kernel para não recalcular.
+    `CAGR %` é NaN em janelas menores que MIN_CAGR_DAYS.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    position = np.asarray(position)
+    n = len(equity)
+    if ppy is None:
+        ppy = periods_per_year(timestamps) if timestamps is not None else 365.0
+
+    # Retornos por barra (a primeira barra parte do capital inicial)
+    prev_equity = np.empty(n)
+    prev_equity[0] = initial_capital
+    prev_equity[1:] = equity[:-1]
+    returns = equity / prev_equity - 1
+
+    std = returns.std()
+    sharpe = returns.mean() / std * np.sqrt(ppy) if std > 0 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+    sortino = returns.mean() / downside * np.sqrt(ppy) if downside > 0 else 0.0
+
+    # Drawdown e duração (maior intervalo em barras entre dois topos)
+    running_max = np.maximum.accumulate(equity)
+    np.maximum(running_max, initial_capital, out=running_max)
+    max_drawdown = (equity / running_max).min() - 1
+    peaks = np.flatnonzero(equity >= running_max)
+    if len(peaks):
+        gaps = np.diff(peaks, prepend=-1, append=n)
+        dd_duration = int(gaps.max()) - 1
+    else:
+        dd_duration = n
+
+    years = n / ppy
+    final = equity[-1]
+    if years * 365 < MIN_CAGR_DAYS:
+        cagr = np.nan
+    else:
+        cagr = (final / initial_capital) ** (1 / years) - 1 if final > 0 else 0.0
+
+    # Trades: entrada quando a posição vai de 0 para 1, saída de 1 para 0
+    if entries is None or exits is None:
+        prev_pos = np.concatenate(([0], position[:-1]))
+        entries = np.flatnonzero((position == 1) & (prev_pos == 0))
+        exits = np.flatnonzero((position == 0) & (prev_pos == 1))
+    closed = entries[:len(exits)]
+    capital_before = prev_equity[closed]
+    trade_pnl = equity[exits] - capital_before
+    gains = trade_pnl[trade_pnl > 0].sum()
+    losses = -trade_pnl[trade_pnl < 0].sum()
+
+    return {
+        'Total Return %': (final - initial_capital) / initial_capital * 100,
+        'Final Equity': final,
+        'Num Trades': (len(entries) + len(exits)) // 2,
+        'CAGR %': cagr * 100,
+        'Sharpe': sharpe,
+        'Sortino': sortino,
+        'Max Drawdown %': max_drawdown * 100,
+        'Max Drawdown Duration': dd_duration,
+        'Win Rate %': (trade_pnl > 0).mean() * 100 if len(exits) else 0.0,
+        'Profit Factor': gains / losses if losses > 0 else (np.inf if gains > 0 else 0.0),
+        'Exposure %': np.count_nonzero(position) / n * 100,
+        'Avg Trade Duration': float((exits - closed).mean()) if len(exits) else 0.0,
+    }
@@ -0,0 +1,114 @@
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+import tensorflow as tf
+from core.gru_model import GRUModel
+from core.paths import data_path
+
+def data_hash(df, target_col='close'):
+    # Hash dos timestamps e do alvo: identifica exatamente os candles usados no treino
+    h = hashlib.sha1()
+    h.update(df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64).tobytes())
+    h.update(df[target_col].to_numpy(dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+class ModelRegistry:
+    """
+    Guarda modelos GRU treinados (Keras + MinMaxScaler) em disco, um diretório por
+    símbolo/timeframe/lookback/arquitetura. Modelos carregados ficam também em
+    memória, então reruns do Streamlit não voltam ao disco.
+    """
+    def __init__(self, root=None):
+        self.root = root or os.path.dirname(data_path('models', 'x'))
+        self._loaded = {}
+
+    def key(self, symbol, timeframe, lookback, arch):
+        arch_id = hashlib.sha1(json.dumps(arch, sort_keys=True).encode()).hexdigest()[:10]
+        safe_symbol = symbol.replace('/', '-').replace(':', '_')
+        return os.path.join(safe_symbol, timeframe, f"lb{lookback}_{arch_id}")
+
+    def save(self, key, gru, meta):
+        path = os.path.join(self.root, key)
+        os.makedirs(path, exist_ok=True)
+        gru.model.save(os.path.join(path, 'model.keras'))
+        with open(os.path.join(path, 'scalers.pkl'), 'wb') as f:
+            pickle.dump((gru.scaler, gru.feature_scaler), f)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        self._loaded[key] = (gru, meta)
+
+    def load(self, key):
+        """Retorna (GRUModel, meta) ou (None, None) se não houver modelo salvo."""
+        if key in self._loaded:
+            return self._loaded[key]
+        path = os.path.join(self.root, key)
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            return None, None
+
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        gru = GRUModel(lookback=meta['lookback'], features=meta.get('features'))
+        gru.model = tf.keras.models.load_model(os.path.join(path, 'model.keras'))
+        with open(os.path.join(path, 'scalers.pkl'), 'rb') as f:
+            gru.scaler, gru.feature_scaler = pickle.load(f)
+        self._loaded[key] = (gru, meta)
+        return gru, meta
+
+def load_or_train_gru(df, symbol, timeframe, lookback=60, units=50, dropout=0.2, layers=2,
+                      features=None, epochs=5, fine_tune_epochs=2, train_end=None,
+                      registry=None, force=False, target_col='close'):
+    """
+    Devolve (GRUModel, status) onde status é:
+    - 'cached': mesmos dados do último treino, modelo carregado sem treinar;
+    - 'fine_tuned': warm-start a partir do modelo salvo, treinando só as janelas
+      cujo alvo é um candle novo desde o último treino;
+    - 'trained': nenhum modelo compatível, treino do zero.
+    `train_end` limita as janelas de treino (ex.: split treino/teste).
+    Os scalers do modelo salvo são mantidos no warm-start para não invalidar os pesos.
+    """
+    registry = registry or ModelRegistry()
+    arch = {'units': units, 'dropout': dropout, 'layers': layers, 'features': features or [target_col]}
+    key = registry.key(symbol, timeframe, lookback, arch)
+
+    cols = list(dict.fromkeys([target_col] + list(features or [])))
+    rows = df.loc[df[cols].dropna().index]
+    n_windows = len(rows) - lookback
+    end = n_windows if train_end is None else min(train_end, n_windows)
+    trained_rows = rows.iloc[:end + lookback]
+    timestamps = trained_rows['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+    current_hash = data_hash(trained_rows, target_col)
+
+    gru, meta = (None, None) if force else registry.load(key)
+
+    if gru is not None and meta['data_hash'] == current_hash:
+        return gru, 'cached'
+
+    start = None
+    if gru is not None:
+        # Primeira janela cujo alvo vem depois do último candle já treinado
+        pos = np.searchsorted(timestamps, meta['last_timestamp'], side='right')
+        start = max(pos - lookback, 0)
+        if start >= end:
+            return gru, 'cached'
+
+    if start is None:
+        gru = GRUModel(lookback=lookback, features=features)
+        gru.build_model(units=units, dropout=dropout, layers=layers)
+        gru.train(gru.make_dataset(df, target_col, end=end, shuffle=True), epochs=epochs)
+        status = 'trained'
+    else:
+        gru.train(gru.make_dataset(df, target_col, start=start, end=end, shuffle=True, fit=False),
+                  epochs=fine_tune_epochs)
+        status = 'fine_tuned'
+
+    meta = {
+        'lookback': lookback,
+        'features': features,
+        'arch': arch,
+        'data_hash': current_hash,
+        'last_timestamp': int(timestamps[-1]),
+    }
+    registry.save(key, gru, meta)
+    return gru, status
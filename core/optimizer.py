@@ -1,8 +1,20 @@
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import optuna
-from core.strategies import StrategyEngine
-from core.backtest_engine import run_backtest
+import numpy as np
+import pandas as pd
+from core.strategies import StrategyEngine, RollingMeanCache, ma_cross_signals_batch
+from core.backtest_engine import run_backtest_signals, run_backtest_batch, position_from_signal, backtest_kernel
+from core.indicators import FEATURE_CACHE, data_version
+from core.paths import data_path
 
-def objective_ma(trial, df):
+try:
+    from optuna.storages.journal import JournalFileBackend
+except ImportError:  # optuna < 4.0
+    from optuna.storages import JournalFileStorage as JournalFileBackend
+
+def objective_ma(trial, df, cache=FEATURE_CACHE, metric='Total Return %'):
     # Definir espaço de busca
     fast_ma = trial.suggest_int('fast_ma', 5, 50)
     slow_ma = trial.suggest_int('slow_ma', 51, 200)
@@ -10,13 +22,250 @@ def objective_ma(trial, df):
     if fast_ma >= slow_ma:
         return -1000 # Penalidade
         
-    strat = StrategyEngine(df)
-    df_sig = strat.ma_cross(fast_period=fast_ma, slow_period=slow_ma)
+    strat = StrategyEngine(df, cache=cache)
+    signals = strat.ma_cross_signals(fast_period=fast_ma, slow_period=slow_ma)
     
-    _, metrics, _ = run_backtest(df_sig)
-    return metrics['Total Return %']
+    _, metrics, _ = run_backtest_signals(df, signals)
+    return metrics[metric]
+
+# Métricas em que valores menores são melhores; as demais são maximizadas
+MINIMIZE_METRICS = {'Max Drawdown Duration'}
+
+def optimize_strategy(df, n_trials=20, metric='Total Return %'):
+    # `metric` é qualquer chave de core.metrics.compute_metrics (ex.: 'Sharpe', 'Max Drawdown %')
+    direction = 'minimize' if metric in MINIMIZE_METRICS else 'maximize'
+    study = optuna.create_study(direction=direction)
+    study.optimize(lambda trial: objective_ma(trial, df, metric=metric), n_trials=n_trials)
+    return study.best_params, study.best_value
+
+def _valid_close(df):
+    """
+    Close de todas as linhas com preço (colunas de indicadores com NaN não descartam
+    barras), para que as médias usem o mesmo histórico de StrategyEngine.ma_cross_signals.
+    Antes de a média lenta existir o sinal é 0 e a posição fica flat, o que equivale
+    a run_backtest_signals ignorar essas barras. Retorna (close, máscara das linhas).
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(close)
+    return close[valid], valid
+
+def evaluate_ma_grid(df, param_sets, initial_capital=1000, fee_pct=0.001, chunk_size=256):
+    """
+    Avalia vários pares (fast_ma, slow_ma) do MA Cross numa única chamada.
+    As médias vêm de um cache de soma cumulativa e as curvas de capital são
+    simuladas em blocos (params x barras). Retorna um DataFrame com uma linha por par.
+    """
+    param_sets = [(int(f), int(s)) for f, s in param_sets]
+
+    cache = RollingMeanCache(_valid_close(df)[0])
+
+    final_equity = np.empty(len(param_sets))
+    num_trades = np.empty(len(param_sets), dtype=np.int64)
+    for start in range(0, len(param_sets), chunk_size):
+        chunk = param_sets[start:start + chunk_size]
+        signals = ma_cross_signals_batch(cache, chunk)
+        eq, nt = run_backtest_batch(cache.close, signals, initial_capital, fee_pct)
+        final_equity[start:start + len(chunk)] = eq
+        num_trades[start:start + len(chunk)] = nt
+
+    return pd.DataFrame({
+        'fast_ma': [p[0] for p in param_sets],
+        'slow_ma': [p[1] for p in param_sets],
+        'Total Return %': (final_equity - initial_capital) / initial_capital * 100,
+        'Final Equity': final_equity,
+        'Num Trades': num_trades,
+    })
+
+def optimize_strategy_grid(df, fast_range=range(5, 51), slow_range=range(51, 201)):
+    # Varre todo o espaço de busca de objective_ma de uma vez (46 x 150 por padrão)
+    param_sets = [(f, s) for f in fast_range for s in slow_range if f < s]
+    results = evaluate_ma_grid(df, param_sets)
+    best = results.loc[results['Total Return %'].idxmax()]
+    best_params = {'fast_ma': int(best['fast_ma']), 'slow_ma': int(best['slow_ma'])}
+    return best_params, float(best['Total Return %'])
+
+# --- Otimização paralela com estudo persistente ---
+
+# Estado por processo worker: o close é carregado uma vez (memory-map) e as
+# médias móveis ficam em cache entre trials do mesmo worker.
+_worker_cache = None
+
+def _init_worker(close_path):
+    global _worker_cache
+    _worker_cache = RollingMeanCache(np.load(close_path, mmap_mode='r'))
+
+def get_storage(path=None):
+    path = path or data_path('optuna', 'studies.log')
+    return optuna.storages.JournalStorage(JournalFileBackend(path))
+
+def data_fingerprint(df):
+    # Identifica o conjunto de dados para que um estudo interrompido (e o close salvo do
+    # walk-forward) seja retomado apenas sobre os mesmos candles: hash do OHLCV inteiro
+    # (data_version) e dos timestamps, não só das pontas
+    h = hashlib.sha1(data_version(df).encode())
+    h.update(df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64).tobytes())
+    return h.hexdigest()[:12]
+
+def objective_ma_pruned(trial, cache, initial_capital=1000, fee_pct=0.001, n_steps=4):
+    fast_ma = trial.suggest_int('fast_ma', 5, 50)
+    slow_ma = trial.suggest_int('slow_ma', 51, 200)
+
+    signals = ma_cross_signals_batch(cache, [(fast_ma, slow_ma)])[0]
+    position = position_from_signal(signals)
+    prev = np.concatenate(([0], position[:-1]))
+    close = np.asarray(cache.close)
+    log_ratio = np.concatenate(([0.0], np.log(close[1:] / close[:-1])))
+    log_fee = np.log(1 - fee_pct)
+
+    # Avalia a curva de capital em blocos e reporta o retorno parcial a cada bloco,
+    # permitindo que o pruner descarte trials ruins antes de percorrer toda a série
+    log_equity = 0.0
+    bounds = np.linspace(0, len(close), n_steps + 1).astype(int)
+    for step, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        held = prev[start:end] == 1
+        log_equity += log_ratio[start:end][held].sum()
+        log_equity += (position[start:end] != prev[start:end]).sum() * log_fee
+
+        partial_return = (np.exp(log_equity) - 1) * 100
+        trial.report(partial_return, step)
+        if trial.should_prune():
+            raise optuna.TrialPruned()
+    return partial_return
+
+def _make_pruner(pruning):
+    return optuna.pruners.MedianPruner(n_warmup_steps=1) if pruning else optuna.pruners.NopPruner()
+
+def _run_worker(study_name, storage_path, n_trials, pruning):
+    # Sampler e pruner não ficam no storage, então cada worker cria os seus
+    study = optuna.load_study(study_name=study_name, storage=get_storage(storage_path),
+                              pruner=_make_pruner(pruning))
+    study.optimize(lambda trial: objective_ma_pruned(trial, _worker_cache), n_trials=n_trials)
+    return n_trials
+
+def optimize_strategy_parallel(df, n_trials=100, n_workers=None, study_name=None,
+                               storage_path=None, pruning=True):
+    """
+    Distribui os trials do Optuna entre processos. Todos os workers usam o mesmo
+    estudo num journal local, então um estudo interrompido é retomado na próxima
+    chamada com o mesmo study_name e vários workers podem rodar sobre ele.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    study_name = study_name or f"ma_cross_{data_fingerprint(df)}"
+    storage_path = storage_path or data_path('optuna', 'studies.log')
+
+    study = optuna.create_study(study_name=study_name, storage=get_storage(storage_path),
+                                direction='maximize', pruner=_make_pruner(pruning), load_if_exists=True)
+
+    # O close vai para um .npy uma única vez; cada worker faz memory-map no início
+    # em vez de receber o DataFrame a cada trial
+    close_path = data_path('optuna', f"{study_name}_close.npy")
+    np.save(close_path, _valid_close(df)[0])
+
+    per_worker = [n_trials // n_workers + (1 if i < n_trials % n_workers else 0) for i in range(n_workers)]
+    per_worker = [n for n in per_worker if n > 0]
+    with ProcessPoolExecutor(max_workers=len(per_worker), initializer=_init_worker,
+                             initargs=(close_path,)) as pool:
+        futures = [pool.submit(_run_worker, study_name, storage_path, n, pruning)
+                   for n in per_worker]
+        for f in futures:
+            f.result()
 
-def optimize_strategy(df, n_trials=20):
-    study = optuna.create_study(direction='maximize')
-    study.optimize(lambda trial: objective_ma(trial, df), n_trials=n_trials)
     return study.best_params, study.best_value
+
+# --- Walk-forward ---
+
+def _ma_param_grid(fast_range=range(5, 51), slow_range=range(51, 201)):
+    return [(f, s) for f in fast_range for s in slow_range if f < s]
+
+def _walk_forward_fold(fold, train, test, param_sets, initial_capital, fee_pct, chunk_size=256):
+    # Roda no worker: as médias vêm do cache da série inteira (_worker_cache), calculadas
+    # uma vez por janela e só recortadas em cada fold. Como a SMA em t só usa dados até t,
+    # o recorte não introduz look-ahead.
+    cache = _worker_cache
+    close = np.asarray(cache.close)
+    train_close = close[train[0]:train[1]]
+
+    best_return, best_params = -np.inf, None
+    for start in range(0, len(param_sets), chunk_size):
+        chunk = param_sets[start:start + chunk_size]
+        signals = ma_cross_signals_batch(cache, chunk, *train)
+        equity, _ = run_backtest_batch(train_close, signals, initial_capital, fee_pct)
+        best = int(np.argmax(equity))
+        if equity[best] > best_return:
+            best_return, best_params = equity[best], chunk[best]
+
+    test_signal = ma_cross_signals_batch(cache, [best_params], *test)[0]
+    test_equity = backtest_kernel(close[test[0]:test[1]], test_signal, 1.0, fee_pct)[0]
+    return {
+        'fold': fold,
+        'train_start': train[0], 'train_end': train[1],
+        'test_start': test[0], 'test_end': test[1],
+        'fast_ma': best_params[0], 'slow_ma': best_params[1],
+        'train_return %': (best_return / initial_capital - 1) * 100,
+        'test_return %': (test_equity[-1] - 1) * 100,
+        'test_equity': test_equity,
+    }
+
+def walk_forward_folds(n_bars, train_size, test_size, step=None):
+    # Folds deslizantes: treino [i, i+train), teste [i+train, i+train+test)
+    step = step or test_size
+    folds = []
+    start = 0
+    while start + train_size + test_size <= n_bars:
+        folds.append(((start, start + train_size), (start + train_size, start + train_size + test_size)))
+        start += step
+    return folds
+
+def walk_forward(df, train_size=1000, test_size=250, step=None, param_sets=None,
+                 initial_capital=1000, fee_pct=0.001, n_workers=None):
+    """
+    Otimização walk-forward do MA Cross: para cada fold otimiza (varredura em lote)
+    no treino e avalia os melhores parâmetros no teste seguinte, fora da amostra.
+    Os folds rodam em paralelo e cada worker reaproveita as médias entre folds.
+    Retorna (folds_df, oos_equity_df, metrics).
+    """
+    close, valid = _valid_close(df)
+    folds = walk_forward_folds(len(close), train_size, test_size, step)
+    if not folds:
+        raise ValueError("Dados insuficientes para um fold de treino + teste")
+    param_sets = param_sets or _ma_param_grid()
+    n_workers = min(n_workers or os.cpu_count() or 1, len(folds))
+
+    close_path = data_path('walk_forward', f"{data_fingerprint(df)}_close.npy")
+    np.save(close_path, close)
+
+    args = [(i, train, test, param_sets, initial_capital, fee_pct) for i, (train, test) in enumerate(folds)]
+    if n_workers == 1:
+        _init_worker(close_path)
+        results = [_walk_forward_fold(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(close_path,)) as pool:
+            results = list(pool.map(_walk_forward_fold, *zip(*args)))
+
+    # Curva fora da amostra: encadeia os testes, cada um partindo do capital final do anterior
+    # (com step < test_size os testes se sobrepõem; só a parte nova de cada fold entra na curva)
+    timestamps = df['timestamp'].to_numpy()[valid]
+    capital = float(initial_capital)
+    curve_ts, curve_eq = [], []
+    covered_until = 0
+    for res in results:
+        skip = max(covered_until - res['test_start'], 0)
+        equity = res['test_equity'][skip:]
+        if len(equity) == 0:
+            continue
+        base = res['test_equity'][skip - 1] if skip else 1.0
+        curve_ts.append(timestamps[res['test_start'] + skip:res['test_end']])
+        curve_eq.append(capital * equity / base)
+        capital = curve_eq[-1][-1]
+        covered_until = res['test_end']
+
+    oos_equity = pd.DataFrame({'timestamp': np.concatenate(curve_ts), 'equity': np.concatenate(curve_eq)})
+    folds_df = pd.DataFrame([{k: v for k, v in r.items() if k != 'test_equity'} for r in results])
+    metrics = {
+        'OOS Return %': (capital / initial_capital - 1) * 100,
+        'Final Equity': capital,
+        'Num Folds': len(results),
+        'Positive Folds %': (folds_df['test_return %'] > 0).mean() * 100,
+    }
+    return folds_df, oos_equity, metrics
@@ -0,0 +1,11 @@
+import os
+
+# Diretório local onde o app guarda estudos, candles e modelos entre execuções.
+# Pode ser trocado pela variável de ambiente TRADING_APP_DATA.
+DATA_DIR = os.environ.get('TRADING_APP_DATA', os.path.join(os.getcwd(), '.data'))
+
+def data_path(*parts):
+    """Monta um caminho dentro de DATA_DIR, criando os diretórios pai se necessário."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
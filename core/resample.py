@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import ccxt
+from core.candle_store import OHLCV_DTYPE
+from core.indicators import FEATURE_CACHE, compute_features
+
+WEEK_MS = 7 * 24 * 3600 * 1000
+# Semanas do ccxt começam na segunda-feira; 1970-01-01 (epoch) foi uma quinta
+WEEK_OFFSET_MS = 4 * 24 * 3600 * 1000
+
+def timeframe_ms(timeframe):
+    if timeframe.endswith('M'):
+        raise ValueError("Timeframes mensais não têm duração fixa e não podem ser reamostrados")
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+def bucket_start(ts, timeframe):
+    """Início (ms) do candle de `timeframe` que contém cada timestamp."""
+    tf_ms = timeframe_ms(timeframe)
+    offset = WEEK_OFFSET_MS if tf_ms % WEEK_MS == 0 else 0
+    return (np.asarray(ts, dtype=np.int64) - offset) // tf_ms * tf_ms + offset
+
+def can_resample(base_tf, target_tf):
+    base_ms, target_ms = timeframe_ms(base_tf), timeframe_ms(target_tf)
+    return target_ms > base_ms and target_ms % base_ms == 0
+
+def htf_bars(n_bars, base_tf, target_tf):
+    """Quantos candles completos de `target_tf` cabem em `n_bars` barras de `base_tf`."""
+    return n_bars * timeframe_ms(base_tf) // timeframe_ms(target_tf)
+
+def resample_array(arr, base_tf, target_tf, drop_partial_first=True):
+    """
+    Agrega candles de `base_tf` (array estruturado OHLCV_DTYPE, ts em ms, ordenado)
+    em `target_tf`: open do primeiro, high máximo, low mínimo, close do último e
+    soma do volume. O último candle pode estar em formação, como na exchange.
+    `drop_partial_first` descarta o primeiro candle se o histórico começa no meio dele.
+    """
+    if not can_resample(base_tf, target_tf):
+        raise ValueError(f"{target_tf} não é múltiplo de {base_tf}")
+    if len(arr) == 0:
+        return np.empty(0, dtype=OHLCV_DTYPE)
+
+    buckets = bucket_start(arr['timestamp'], target_tf)
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.concatenate((starts[1:], [len(arr)])) - 1
+
+    out = np.empty(len(starts), dtype=OHLCV_DTYPE)
+    out['timestamp'] = buckets[starts]
+    out['open'] = arr['open'][starts]
+    out['high'] = np.maximum.reduceat(arr['high'], starts)
+    out['low'] = np.minimum.reduceat(arr['low'], starts)
+    out['close'] = arr['close'][ends]
+    out['volume'] = np.add.reduceat(arr['volume'], starts)
+
+    if drop_partial_first and arr['timestamp'][0] != out['timestamp'][0]:
+        out = out[1:]
+    return out
+
+def resample_ohlcv(df, base_tf, target_tf, drop_partial_first=True):
+    """Mesmo que resample_array, para o DataFrame de fetch_ohlcv (timestamp datetime)."""
+    arr = np.empty(len(df), dtype=OHLCV_DTYPE)
+    arr['timestamp'] = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        arr[col] = df[col].to_numpy()
+    res = resample_array(arr, base_tf, target_tf, drop_partial_first)
+    out = pd.DataFrame({col: res[col] for col in OHLCV_DTYPE.names})
+    out['timestamp'] = pd.to_datetime(out['timestamp'], unit='ms')
+    return out
+
+class Resampler:
+    """
+    Reamostragem incremental para o ao vivo: recebe candles do timeframe base (o
+    último pode ser reenviado enquanto está em formação) e mantém o candle de
+    `target_tf` em formação atualizado em O(1). `update` devolve a lista de candles
+    de `target_tf` que fecharam com este candle base.
+    """
+    def __init__(self, base_tf, target_tf):
+        if not can_resample(base_tf, target_tf):
+            raise ValueError(f"{target_tf} não é múltiplo de {base_tf}")
+        self.base_tf = base_tf
+        self.target_tf = target_tf
+        self.bucket = None
+        self._closed = None   # agregado dos candles base já fechados do bucket atual
+        self._last = None     # último candle base (pode ser atualizado)
+
+    @staticmethod
+    def _merge(agg, candle):
+        if agg is None:
+            return dict(candle)
+        return {
+            'timestamp': agg['timestamp'],
+            'open': agg['open'],
+            'high': max(agg['high'], candle['high']),
+            'low': min(agg['low'], candle['low']),
+            'close': candle['close'],
+            'volume': agg['volume'] + candle['volume'],
+        }
+
+    @property
+    def current(self):
+        """Candle de `target_tf` em formação (dict) ou None."""
+        if self._last is None:
+            return None
+        bar = self._merge(self._closed, self._last)
+        bar['timestamp'] = self.bucket
+        return bar
+
+    def update(self, candle):
+        closed = []
+        bucket = int(bucket_start(candle['timestamp'], self.target_tf))
+        if self.bucket is not None and bucket > self.bucket:
+            closed.append(self.current)
+            self._closed, self._last = None, None
+        self.bucket = bucket if self.bucket is None else max(self.bucket, bucket)
+        if bucket < self.bucket:
+            return closed  # candle atrasado de um bucket já fechado
+
+        if self._last is not None and candle['timestamp'] > self._last['timestamp']:
+            self._closed = self._merge(self._closed, self._last)
+        if self._last is None or candle['timestamp'] >= self._last['timestamp']:
+            self._last = dict(candle)
+        return closed
+
+def align_to_base(base_ts, base_tf, htf_ts, htf_tf, values):
+    """
+    Projeta valores de um timeframe maior nas barras do timeframe base sem
+    look-ahead: cada barra base só vê o último candle maior que já fechou
+    quando ela fecha. Barras sem candle maior fechado recebem NaN.
+    Timestamps em ms (abertura dos candles).
+    """
+    base_close = np.asarray(base_ts, dtype=np.int64) + timeframe_ms(base_tf)
+    htf_close = np.asarray(htf_ts, dtype=np.int64) + timeframe_ms(htf_tf)
+    idx = np.searchsorted(htf_close, base_close, side='right') - 1
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.full(len(base_close), np.nan)
+    out = values[np.maximum(idx, 0)]
+    out[idx < 0] = np.nan
+    return out
+
+def htf_features(df, base_tf, htf, features, cache=FEATURE_CACHE):
+    """
+    Features calculadas em `htf` (reamostrado localmente a partir de `df`) e
+    alinhadas às barras de `df` sem look-ahead. Retorna {f'{coluna}_{htf}': array}.
+    """
+    htf_df = resample_ohlcv(df, base_tf, htf)
+    base_ts = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+    htf_ts = htf_df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+    return {f'{name}_{htf}': align_to_base(base_ts, base_tf, htf_ts, htf, values)
+            for name, values in compute_features(htf_df, features, cache).items()}
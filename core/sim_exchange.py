@@ -0,0 +1,154 @@
+import asyncio
+import time
+import zlib
+import numpy as np
+import ccxt
+
+class SimulatedExchange:
+    """
+    Exchange local que imita a interface assíncrona do ccxt (ccxt.async_support)
+    para testes e benchmarks sem rede. Os candles são um passeio aleatório
+    determinístico por símbolo, terminando no instante `now` (ms).
+    """
+    rateLimit = 0
+    parse_timeframe = staticmethod(ccxt.Exchange.parse_timeframe)
+
+    def __init__(self, now=1_700_000_000_000, latency=0.0, start_price=30000.0, tick_ms=None, fill_delay=0.0):
+        self.now = now
+        self.latency = latency
+        self.start_price = start_price
+        # Quanto o relógio simulado avança a cada watch_ohlcv (None = meio timeframe)
+        self.tick_ms = tick_ms
+        # Tempo (s) até uma ordem limit ser preenchida
+        self.fill_delay = fill_delay
+        self.calls = []
+        self.orders = []
+        self._by_client_id = {}
+        self._failures = []
+        self._lost_acks = 0
+        self._timeframes = {}  # símbolo -> último timeframe consultado (preço das ordens a mercado)
+
+    def fail_next(self, n=1, error=ccxt.NetworkError):
+        # As próximas n chamadas levantam `error` (simula falha transitória de rede)
+        self._failures.extend([error] * n)
+
+    def lose_ack_next(self, n=1):
+        # As próximas n ordens são aceitas pela exchange, mas a resposta "se perde" (NetworkError)
+        self._lost_acks += n
+
+    def _maybe_fail(self):
+        if self._failures:
+            raise self._failures.pop(0)('falha simulada')
+
+    def _price(self, symbol, index):
+        # Preço determinístico para (símbolo, índice da barra)
+        seed = zlib.crc32(symbol.encode())
+        rng = np.random.default_rng([seed, int(index)])
+        return self.start_price * (1 + 0.01 * np.sin(index / 50.0)) * (1 + rng.normal(0, 0.001))
+
+    def candles(self, symbol, timeframe, since=None, limit=500):
+        tf_ms = self.parse_timeframe(timeframe) * 1000
+        last = self.now // tf_ms
+        first = last - limit + 1 if since is None else -(-since // tf_ms)
+        end = min(first + limit, last + 1)
+        out = []
+        for i in range(first, end):
+            open_ = self._price(symbol, i - 1)
+            close = self._price(symbol, i)
+            out.append([i * tf_ms, open_, max(open_, close) * 1.0005,
+                        min(open_, close) * 0.9995, close, 1.0])
+        return out
+
+    def _advance(self, timeframe):
+        self.now += self.tick_ms or self.parse_timeframe(timeframe) * 500
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=500, params=None):
+        # Consultas dos últimos candles (sem `since`) avançam o relógio, como o tempo passando
+        # entre dois polls; o histórico pedido com `since` não mexe no relógio
+        self.calls.append(('fetch_ohlcv', symbol, timeframe))
+        self._timeframes[symbol] = timeframe
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        if since is None:
+            self._advance(timeframe)
+        return self.candles(symbol, timeframe, since, limit)
+
+    async def watch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        # Stream simulado: cada chamada avança o relógio e devolve os últimos candles,
+        # com o mais recente ainda em formação (como no ccxt.pro)
+        self.calls.append(('watch_ohlcv', symbol, timeframe))
+        self._timeframes[symbol] = timeframe
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._advance(timeframe)
+        return self.candles(symbol, timeframe, limit=2)
+
+    def last_price(self, symbol, timeframe=None):
+        # Close do candle em formação no timeframe que está sendo acompanhado (padrão 1m)
+        tf_ms = self.parse_timeframe(timeframe or self._timeframes.get(symbol, '1m')) * 1000
+        return self._price(symbol, self.now // tf_ms)
+
+    def _new_order(self, symbol, order_type, side, amount, price=None, params=None):
+        client_id = (params or {}).get('clientOrderId')
+        if client_id and client_id in self._by_client_id:
+            raise ccxt.DuplicateOrderId(f'clientOrderId {client_id} já existe')
+        is_market = order_type == 'market'
+        order = {
+            'id': str(len(self.orders) + 1),
+            'clientOrderId': client_id,
+            'symbol': symbol,
+            'side': side,
+            'type': order_type,
+            'amount': amount,
+            'filled': amount if is_market else 0.0,
+            'price': self.last_price(symbol) if is_market else price,
+            'status': 'closed' if is_market else 'open',
+            'timestamp': self.now,
+            '_fill_at': time.monotonic() + self.fill_delay,
+        }
+        self.orders.append(order)
+        if client_id:
+            self._by_client_id[client_id] = order
+        return order
+
+    def _public(self, order):
+        # Ordens limit são preenchidas quando passa o fill_delay
+        if order['status'] == 'open' and time.monotonic() >= order['_fill_at']:
+            order['status'] = 'closed'
+            order['filled'] = order['amount']
+        return {k: v for k, v in order.items() if not k.startswith('_')}
+
+    def create_market_order(self, symbol, side, amount, params=None):
+        # Ordem a mercado preenchida na hora ao último preço (síncrona, como o ccxt normal)
+        self.calls.append(('create_market_order', symbol, side))
+        self._maybe_fail()
+        return self._public(self._new_order(symbol, 'market', side, amount, params=params))
+
+    async def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self.calls.append(('create_order', symbol, side))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        order = self._new_order(symbol, type, side, amount, price, params)
+        if self._lost_acks:
+            self._lost_acks -= 1
+            raise ccxt.RequestTimeout('resposta perdida (simulado)')
+        return self._public(order)
+
+    async def fetch_order(self, id, symbol=None, params=None):
+        self.calls.append(('fetch_order', symbol, id))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        client_id = (params or {}).get('clientOrderId')
+        if client_id:
+            order = self._by_client_id.get(client_id)
+        else:
+            order = next((o for o in self.orders if o['id'] == id), None)
+        if order is None:
+            raise ccxt.OrderNotFound(f'ordem {id or client_id} não encontrada')
+        return self._public(order)
+
+    async def close(self):
+        pass
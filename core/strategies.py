@@ -1,55 +1,155 @@
+from collections import namedtuple
 import pandas as pd
+import numpy as np
+from core.compact import CompactOHLCV
+from core.indicators import SMA, STOCH, FEATURE_CACHE, compute_features
+from core.streaming_indicators import RollingWindow
+from core.resample import htf_features
+
+class RollingMeanCache:
+    """
+    Médias móveis simples a partir de uma única soma cumulativa do close.
+    Cada janela é calculada uma vez e reaproveitada entre parâmetros.
+    """
+    def __init__(self, close):
+        self.close = np.asarray(close, dtype=np.float64)
+        self._cumsum = np.concatenate(([0.0], np.cumsum(self.close)))
+        self._cache = {}
+
+    def get(self, window):
+        if window not in self._cache:
+            sma = np.full(len(self.close), np.nan)
+            if window <= len(self.close):
+                sma[window - 1:] = (self._cumsum[window:] - self._cumsum[:-window]) / window
+            self._cache[window] = sma
+        return self._cache[window]
+
+def ma_cross_signals_batch(cache, param_sets, start=0, end=None):
+    """
+    Sinais do MA Cross para vários pares (fast, slow) de uma vez.
+    Retorna array int8 (params x barras) com a mesma regra de StrategyEngine.ma_cross.
+    `start`/`end` recortam as barras sem recalcular as médias (ex.: folds de walk-forward).
+    """
+    end = len(cache.close) if end is None else end
+    signals = np.zeros((len(param_sets), end - start), dtype=np.int8)
+    for row, (fast, slow) in enumerate(param_sets):
+        fast_ma = cache.get(fast)[start:end]
+        slow_ma = cache.get(slow)[start:end]
+        signals[row, fast_ma > slow_ma] = 1
+        signals[row, fast_ma < slow_ma] = -1
+    return signals
+
+class SignalResult(namedtuple('SignalResult', ['signal', 'aux', 'index', 'extra'], defaults=(None,))):
+    """
+    Saída compacta de uma estratégia: `signal` é um array int8 (1, -1, 0)
+    alinhado a `index` e `aux` guarda séries auxiliares (ex.: médias) como arrays.
+    `extra` guarda séries só informativas, que não limitam as barras válidas.
+    """
+    __slots__ = ()
+
+    def valid_mask(self):
+        # Barras em que todas as séries auxiliares já estão definidas
+        valid = np.ones(len(self.signal), dtype=bool)
+        for values in self.aux.values():
+            valid &= ~np.isnan(values)
+        return valid
+
+    def to_frame(self, df):
+        # Formato antigo: cópia do DataFrame com as colunas auxiliares e 'signal'
+        out = df.frame() if isinstance(df, CompactOHLCV) else df.copy()
+        for name, values in {**self.aux, **(self.extra or {})}.items():
+            out[name] = values
+        out['signal'] = self.signal
+        return out
+
+class StreamingMACross:
+    """
+    MA Cross incremental para execução ao vivo: um candle fechado por chamada,
+    mesma regra de StrategyEngine.ma_cross_signals em O(1).
+    """
+    def __init__(self, fast_period=9, slow_period=21):
+        self.fast = RollingWindow(fast_period)
+        self.slow = RollingWindow(slow_period)
+
+    def update(self, candle):
+        self.fast.push(candle['close'])
+        self.slow.push(candle['close'])
+        fast_ma, slow_ma = self.fast.mean(), self.slow.mean()
+        if fast_ma > slow_ma:
+            return 1
+        if fast_ma < slow_ma:
+            return -1
+        return 0
 
 class StrategyEngine:
-    def __init__(self, df):
+    def __init__(self, df, cache=FEATURE_CACHE):
         self.df = df
+        # Cache de features compartilhado: médias/estocástico já calculados para
+        # estes dados (em outra estratégia ou trial) são reaproveitados
+        self.cache = cache
 
-    def ma_cross(self, fast_period=9, slow_period=21):
-        df = self.df.copy()
-        df['fast_ma'] = df['close'].rolling(window=fast_period).mean()
-        df['slow_ma'] = df['close'].rolling(window=slow_period).mean()
-        
-        df['signal'] = 0
+    def features(self, *features):
+        # Cada estratégia declara as features que usa; o resolver calcula só as que faltam
+        if hasattr(self.df, 'features'):
+            # CompactOHLCV: materializa os indicadores em float32 sob demanda
+            return self.df.features(*features)
+        return compute_features(self.df, features, self.cache)
+
+    def ma_cross_signals(self, fast_period=9, slow_period=21):
+        feats = self.features(SMA(fast_period), SMA(slow_period))
+        fast_ma = np.asarray(feats[f'SMA_{fast_period}'])
+        slow_ma = np.asarray(feats[f'SMA_{slow_period}'])
+
+        signal = np.zeros(len(fast_ma), dtype=np.int8)
         # Sinal de compra: Rápida cruza acima da lenta
-        df.loc[df['fast_ma'] > df['slow_ma'], 'signal'] = 1
+        signal[fast_ma > slow_ma] = 1
         # Sinal de venda: Rápida cruza abaixo da lenta
-        df.loc[df['fast_ma'] < df['slow_ma'], 'signal'] = -1
-        return df
+        signal[fast_ma < slow_ma] = -1
+        return SignalResult(signal, {'fast_ma': fast_ma, 'slow_ma': slow_ma}, self.df.index)
 
-    def ma_stoch(self, fast_ma=9, slow_ma=21, k_period=14, overbought=80, oversold=20):
-        df = self.df.copy()
-        
-        # Cálculo manual simples das médias usando Pandas puro (funciona sempre)
-        df['fast_ma'] = df['close'].rolling(window=fast_ma).mean()
-        df['slow_ma'] = df['close'].rolling(window=slow_ma).mean()
-        
-        # O Estocástico já foi calculado no indicators.py e está no DF como 'STOCHk_14_3_3'
-        # Mas se os parametros mudarem, precisamos recalcular. 
-        # Para simplificar, vamos assumir que usamos as colunas já existentes ou recalcular com 'ta' se necessário.
-        # Aqui vamos usar a coluna padrão gerada no indicators.py para evitar erros de importação
-        
-        if 'STOCHk_14_3_3' in df.columns:
-            df['k'] = df['STOCHk_14_3_3']
-        else:
-            # Fallback simples se não existir
-            lowest_low = df['low'].rolling(window=k_period).min()
-            highest_high = df['high'].rolling(window=k_period).max()
-            df['k'] = 100 * ((df['close'] - lowest_low) / (highest_high - lowest_low))
-        
-        df['signal'] = 0
-        
+    def ma_stoch_signals(self, fast_ma=9, slow_ma=21, k_period=14, overbought=80, oversold=20):
+        # O estocástico é pedido com o k_period informado (não mais fixo em 14)
+        feats = self.features(SMA(fast_ma), SMA(slow_ma), STOCH(k_period, 3))
+        fast = np.asarray(feats[f'SMA_{fast_ma}'])
+        slow = np.asarray(feats[f'SMA_{slow_ma}'])
+        k = np.asarray(feats[f'STOCHk_{k_period}_3_3'])
+
+        signal = np.zeros(len(fast), dtype=np.int8)
         # Compra: MA Alta E Stoch saindo de oversold
-        condition_buy = (df['fast_ma'] > df['slow_ma']) & (df['k'] < oversold)
-        df.loc[condition_buy, 'signal'] = 1
-        
+        signal[(fast > slow) & (k < oversold)] = 1
         # Venda: MA Baixa E Stoch saindo de overbought
-        condition_sell = (df['fast_ma'] < df['slow_ma']) & (df['k'] > overbought)
-        df.loc[condition_sell, 'signal'] = -1
-        
-        return df
+        signal[(fast < slow) & (k > overbought)] = -1
+        return SignalResult(signal, {'fast_ma': fast, 'slow_ma': slow, 'k': k}, self.df.index)
+
+    def ma_cross_trend_signals(self, timeframe, fast_period=9, slow_period=21, trend_tf='4h', trend_window=50):
+        # MA Cross com filtro de tendência de um timeframe maior (reamostrado dos próprios
+        # candles, sem look-ahead): não compra com o close abaixo da SMA do `trend_tf`.
+        # Enquanto a SMA do `trend_tf` aquece (NaN), o filtro não atua e as barras
+        # continuam válidas: `trend_ma` vai em `extra`, fora de valid_mask
+        base = self.ma_cross_signals(fast_period, slow_period)
+        trend = htf_features(self.df, timeframe, trend_tf, [SMA(trend_window)], self.cache)
+        trend_ma = trend[f'SMA_{trend_window}_{trend_tf}']
+        close = np.asarray(self.df['close'], dtype=np.float64)
+
+        signal = base.signal.copy()
+        signal[(signal == 1) & (close <= trend_ma)] = 0
+        return SignalResult(signal, base.aux, self.df.index, {'trend_ma': trend_ma})
+
+    # Versões que devolvem o DataFrame completo (mantidas por compatibilidade)
+    def ma_cross(self, fast_period=9, slow_period=21):
+        return self.ma_cross_signals(fast_period, slow_period).to_frame(self.df)
+
+    def ma_stoch(self, fast_ma=9, slow_ma=21, k_period=14, overbought=80, oversold=20):
+        return self.ma_stoch_signals(fast_ma, slow_ma, k_period, overbought, oversold).to_frame(self.df)
 
+    def gru_signal(self, model, threshold=0.0, batch_size=4096, compiled=True):
+        # `model` é um GRUModel treinado. Prevê o próximo fechamento de todos os candles
+        # numa única inferência em lote: compra se a previsão supera o close atual em mais
+        # de `threshold` (fração), vende se fica abaixo na mesma proporção
+        predicted = model.predict_next_close(self.df, batch_size=batch_size, compiled=compiled)
+        close = np.asarray(self.df['close'], dtype=np.float64)
 
-    def gru_signal(self, model, scaler, lookback=60):
-        # Esta função seria chamada iterativamente ou em batch
-        # Retorna um DataFrame com a coluna 'signal' baseada na predição
-        pass
+        signal = np.zeros(len(close), dtype=np.int8)
+        signal[predicted > close * (1 + threshold)] = 1
+        signal[predicted < close * (1 - threshold)] = -1
+        return SignalResult(signal, {'predicted_close': predicted}, self.df.index)
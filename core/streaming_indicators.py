@@ -0,0 +1,272 @@
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Estados O(1) por indicador. Cada classe reproduz a convenção da função
+# equivalente da biblioteca `ta` usada em indicators.add_indicators
+# (min_periods, ewm com adjust=False, desvio padrão populacional etc.).
+
+class RollingWindow:
+    """Janela deslizante em ring buffer com soma e soma dos quadrados."""
+    # A cada `resync_every` atualizações as somas são recalculadas a partir do
+    # buffer para não acumular erro de arredondamento em streams longos
+    resync_every = 10_000
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = np.zeros(window)
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._updates = 0
+
+    def push(self, value):
+        old = self.buffer[self.pos]
+        if self.count == self.window:
+            self.total -= old
+            self.total_sq -= old * old
+        else:
+            self.count += 1
+        self.buffer[self.pos] = value
+        self.total += value
+        self.total_sq += value * value
+        self.pos = (self.pos + 1) % self.window
+
+        self._updates += 1
+        if self._updates % self.resync_every == 0:
+            valid = self.buffer[:self.count] if self.count < self.window else self.buffer
+            self.total = float(valid.sum())
+            self.total_sq = float((valid * valid).sum())
+
+    @property
+    def full(self):
+        return self.count == self.window
+
+    def mean(self):
+        return self.total / self.window if self.full else math.nan
+
+    def std(self):
+        # Desvio padrão populacional (ddof=0), como o ta.volatility.BollingerBands
+        if not self.full:
+            return math.nan
+        mean = self.total / self.window
+        return math.sqrt(max(self.total_sq / self.window - mean * mean, 0.0))
+
+class EMA:
+    """Média exponencial recursiva (ewm adjust=False) com min_periods."""
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = None
+        self.count = 0
+
+    @classmethod
+    def from_span(cls, span):
+        return cls(2.0 / (span + 1), span)
+
+    def push(self, x):
+        # Valores NaN no início são ignorados, como no pandas
+        if x is None or math.isnan(x):
+            return self.current()
+        self.value = x if self.value is None else (1 - self.alpha) * self.value + self.alpha * x
+        self.count += 1
+        return self.current()
+
+    def current(self):
+        return self.value if self.count >= self.min_periods else math.nan
+
+class MonotonicExtreme:
+    """Mínimo ou máximo de uma janela deslizante em O(1) amortizado (deque monotônica)."""
+    def __init__(self, window, mode='min'):
+        self.window = window
+        self.is_min = mode == 'min'
+        self.items = deque()
+        self.index = 0
+
+    def push(self, value):
+        if self.is_min:
+            while self.items and self.items[-1][1] >= value:
+                self.items.pop()
+        else:
+            while self.items and self.items[-1][1] <= value:
+                self.items.pop()
+        self.items.append((self.index, value))
+        if self.items[0][0] <= self.index - self.window:
+            self.items.popleft()
+        self.index += 1
+        return self.items[0][1] if self.index >= self.window else math.nan
+
+class StreamingRSI:
+    """RSI com suavização de Wilder (alpha = 1/window)."""
+    def __init__(self, window=14):
+        self.up = EMA(1.0 / window, window)
+        self.down = EMA(1.0 / window, window)
+        self.prev_close = None
+
+    def push(self, close):
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        up = self.up.push(max(diff, 0.0))
+        down = self.down.push(max(-diff, 0.0))
+        if math.isnan(up) or math.isnan(down):
+            return math.nan
+        if down == 0:
+            return 100.0
+        return 100 - 100 / (1 + up / down)
+
+class StreamingATR:
+    """ATR de Wilder; antes de completar a janela devolve 0, como o ta."""
+    def __init__(self, window=14):
+        self.window = window
+        self.prev_close = None
+        self.count = 0
+        self.tr_sum = 0.0
+        self.value = 0.0
+
+    def push(self, high, low, close):
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.count += 1
+
+        if self.count < self.window:
+            self.tr_sum += tr
+            return 0.0
+        if self.count == self.window:
+            self.value = (self.tr_sum + tr) / self.window
+        else:
+            self.value = (self.value * (self.window - 1) + tr) / self.window
+        return self.value
+
+class ColumnBuffer:
+    """
+    Colunas em arrays pré-alocados: acrescentar uma linha é O(1) amortizado
+    (a capacidade dobra quando enche). O DataFrame só é montado em frame().
+    """
+    def __init__(self, dtypes, capacity=1024):
+        self.size = 0
+        self._data = {col: np.empty(capacity, dtype=dtype) for col, dtype in dtypes.items()}
+
+    @classmethod
+    def from_frame(cls, df):
+        buffer = cls(df.dtypes.to_dict(), capacity=max(2 * len(df), 1024))
+        for col in df.columns:
+            buffer._data[col][:len(df)] = df[col].to_numpy()
+        buffer.size = len(df)
+        return buffer
+
+    def append(self, row):
+        capacity = len(next(iter(self._data.values())))
+        if self.size == capacity:
+            for col, values in self._data.items():
+                grown = np.empty(2 * capacity, dtype=values.dtype)
+                grown[:self.size] = values[:self.size]
+                self._data[col] = grown
+        for col, values in self._data.items():
+            values[self.size] = row.get(col, np.nan)
+        self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    def frame(self):
+        return pd.DataFrame({col: values[:self.size] for col, values in self._data.items()})
+
+class StreamingIndicators:
+    """
+    Versão incremental de indicators.add_indicators: mantém o estado de cada
+    indicador e atualiza em tempo constante a cada candle fechado.
+    Gera as mesmas colunas que add_indicators.
+    """
+    sma_windows = (7, 14, 25, 50, 200)
+
+    def __init__(self):
+        self.sma = {w: RollingWindow(w) for w in self.sma_windows}
+        self.rsi = StreamingRSI(14)
+        self.ema_fast = EMA.from_span(12)
+        self.ema_slow = EMA.from_span(26)
+        self.macd_signal = EMA.from_span(9)
+        self.stoch_low = MonotonicExtreme(14, 'min')
+        self.stoch_high = MonotonicExtreme(14, 'max')
+        self.stoch_d = RollingWindow(3)
+        self.bb = RollingWindow(20)
+        self.atr = StreamingATR(14)
+        # Histórico (OHLCV + indicadores) para append; criado no warm_up ou no primeiro append
+        self.buffer = None
+
+    def update(self, high, low, close):
+        """Processa um candle fechado e devolve {coluna: valor} dos indicadores."""
+        out = {}
+        for w, state in self.sma.items():
+            state.push(close)
+            out[f'SMA_{w}'] = state.mean()
+
+        out['RSI_14'] = self.rsi.push(close)
+
+        fast = self.ema_fast.push(close)
+        slow = self.ema_slow.push(close)
+        macd = fast - slow
+        signal = self.macd_signal.push(macd)
+        out['MACD_12_26_9'] = macd
+        out['MACDh_12_26_9'] = macd - signal
+        out['MACDs_12_26_9'] = signal
+
+        lowest = self.stoch_low.push(low)
+        highest = self.stoch_high.push(high)
+        if math.isnan(lowest):
+            k = math.nan
+        elif highest == lowest:
+            k = math.nan if close == lowest else math.copysign(math.inf, close - lowest)
+        else:
+            k = 100 * (close - lowest) / (highest - lowest)
+        # %D só conta quando há 3 valores válidos de %K seguidos
+        if math.isnan(k):
+            self.stoch_d = RollingWindow(3)
+            d = math.nan
+        else:
+            self.stoch_d.push(k)
+            d = self.stoch_d.mean()
+        out['STOCHk_14_3_3'] = k
+        out['STOCHd_14_3_3'] = d
+
+        self.bb.push(close)
+        mavg = self.bb.mean()
+        std = self.bb.std()
+        out['BBL_20_2.0'] = mavg - 2 * std
+        out['BBM_20_2.0'] = mavg
+        out['BBU_20_2.0'] = mavg + 2 * std
+
+        out['ATR'] = self.atr.push(high, low, close)
+        return out
+
+    def warm_up(self, df):
+        """
+        Alimenta o histórico inteiro e devolve o DataFrame com as colunas de indicadores.
+        As linhas ficam também em `buffer`, onde append acrescenta os próximos candles.
+        """
+        rows = [self.update(h, l, c) for h, l, c in
+                zip(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy())]
+        out = df.copy()
+        if rows:
+            ind = pd.DataFrame(rows, index=df.index)
+            for col in ind.columns:
+                out[col] = ind[col]
+        self.buffer = ColumnBuffer.from_frame(out.reset_index(drop=True))
+        return out
+
+    def append(self, candle):
+        """
+        Processa um candle fechado (dict com timestamp/open/high/low/close/volume),
+        guarda a linha em `buffer` sem copiar o histórico e devolve só a nova linha.
+        O DataFrame completo sai de `buffer.frame()` quando necessário.
+        """
+        row = dict(candle)
+        row.update(self.update(candle['high'], candle['low'], candle['close']))
+        if self.buffer is None:
+            self.buffer = ColumnBuffer({col: np.asarray(value).dtype for col, value in row.items()})
+        self.buffer.append(row)
+        return row
@@ -0,0 +1,67 @@
+"""
+Bot headless (sem Streamlit): roda o MA Cross ao vivo com o LiveRunner.
+
+Exemplos:
+    python live_bot.py --exchange binance --symbol BTC/USDT --timeframe 1m --amount 0.001 --testnet
+    python live_bot.py --simulate --max-bars 50     # exchange simulada local, sem rede
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from core.execution import ExecutionService
+from core.live_runner import LiveRunner
+from core.strategies import StreamingMACross
+
+def build_feed(exchange_id, market_type, testnet, api_key=None, secret=None):
+    # ccxt.pro (websocket) quando disponível; senão o cliente assíncrono com polling
+    try:
+        import ccxt.pro as ccxt_feed
+    except ImportError:
+        import ccxt.async_support as ccxt_feed
+    params = {'enableRateLimit': True, 'options': {'defaultType': market_type}}
+    if api_key and secret:
+        params['apiKey'] = api_key
+        params['secret'] = secret
+    feed = getattr(ccxt_feed, exchange_id)(params)
+    if testnet:
+        feed.set_sandbox_mode(True)
+    return feed
+
+async def main(args):
+    if args.simulate:
+        from core.sim_exchange import SimulatedExchange
+        feed = SimulatedExchange()
+    else:
+        feed = build_feed(args.exchange, args.market_type, args.testnet,
+                          os.environ.get('API_KEY'), os.environ.get('API_SECRET'))
+    # O mesmo cliente assíncrono recebe os candles e as ordens
+    executor = ExecutionService(feed)
+
+    runner = LiveRunner(feed, executor, args.symbol, args.timeframe,
+                        StreamingMACross(args.fast, args.slow), args.amount,
+                        poll_interval=args.poll_interval, use_websocket=not args.polling)
+    try:
+        await runner.run(max_bars=args.max_bars)
+    finally:
+        await feed.close()
+    logging.info("Ordens executadas: %d", len(runner.fills))
+    logging.info("Latências: %s", executor.latency_report())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exchange', default='binance')
+    parser.add_argument('--market-type', default='swap')
+    parser.add_argument('--symbol', default='BTC/USDT')
+    parser.add_argument('--timeframe', default='1m')
+    parser.add_argument('--fast', type=int, default=9)
+    parser.add_argument('--slow', type=int, default=21)
+    parser.add_argument('--amount', type=float, default=0.001)
+    parser.add_argument('--testnet', action='store_true')
+    parser.add_argument('--polling', action='store_true', help='Força polling REST em vez de websocket.')
+    parser.add_argument('--poll-interval', type=float, default=None)
+    parser.add_argument('--max-bars', type=int, default=None)
+    parser.add_argument('--simulate', action='store_true', help='Usa a exchange simulada local.')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,9 @@
+import pytest
+
+import core.paths
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    # Estudos, candles e modelos criados nos testes ficam num diretório temporário
+    monkeypatch.setattr(core.paths, 'DATA_DIR', str(tmp_path / 'data'))
+    return tmp_path / 'data'
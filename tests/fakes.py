@@ -0,0 +1,57 @@
+import ccxt
+import numpy as np
+
+from core.candle_store import OHLCV_DTYPE
+from core.resample import bucket_start, resample_array, timeframe_ms
+
+MINUTE_MS = 60_000
+
+class HistoryClient:
+    """
+    Cliente ccxt síncrono mínimo para testar o CandleStore: candles de 1m
+    determinísticos até `now` (o último em formação) e timeframes maiores agregados
+    deles, então uma série baixada e uma reamostrada localmente coincidem.
+    Registra cada fetch_ohlcv em `requests` como (timeframe, since, limit).
+    """
+    parse_timeframe = staticmethod(ccxt.Exchange.parse_timeframe)
+
+    def __init__(self, now=1_700_000_000_000 - 1_700_000_000_000 % 86_400_000 + 30_000):
+        self.now = now
+        self.requests = []
+
+    @staticmethod
+    def minute_bars(first, last):
+        # Barras de 1m de índice first..last (índice = timestamp // 60000)
+        index = np.arange(first, last + 1, dtype=np.int64)
+        close = 30000.0 * (1 + 0.02 * np.sin(index / 500.0)) * (1 + 0.001 * np.sin(index * 12.9898))
+        open_ = 30000.0 * (1 + 0.02 * np.sin((index - 1) / 500.0)) * (1 + 0.001 * np.sin((index - 1) * 12.9898))
+        out = np.empty(len(index), dtype=OHLCV_DTYPE)
+        out['timestamp'] = index * MINUTE_MS
+        out['open'] = open_
+        out['high'] = np.maximum(open_, close) * 1.0005
+        out['low'] = np.minimum(open_, close) * 0.9995
+        out['close'] = close
+        out['volume'] = 1.0 + (index % 7)
+        return out
+
+    def bars(self, timeframe, first_ts, last_ts):
+        # Candles de `timeframe` com abertura entre first_ts e last_ts (inclusive)
+        tf_ms = timeframe_ms(timeframe)
+        first_ts = int(bucket_start(first_ts, timeframe))
+        last_ts = min(last_ts, int(bucket_start(self.now, timeframe)))
+        if last_ts < first_ts:
+            return np.empty(0, dtype=OHLCV_DTYPE)
+        end = min(last_ts + tf_ms, self.now + 1) - 1
+        minutes = self.minute_bars(first_ts // MINUTE_MS, end // MINUTE_MS)
+        return minutes if timeframe == '1m' else resample_array(minutes, '1m', timeframe)
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=500):
+        self.requests.append((timeframe, since, limit))
+        tf_ms = timeframe_ms(timeframe)
+        last_ts = int(bucket_start(self.now, timeframe))
+        if since is None:
+            arr = self.bars(timeframe, last_ts - (limit - 1) * tf_ms, last_ts)
+        else:
+            first_ts = -(-since // tf_ms) * tf_ms
+            arr = self.bars(timeframe, first_ts, first_ts + (limit - 1) * tf_ms)
+        return [list(row) for row in arr.tolist()]
@@ -0,0 +1,61 @@
+import asyncio
+
+import ccxt
+import pytest
+
+from core.async_exchange_manager import AsyncExchangeManager
+from core.sim_exchange import SimulatedExchange
+
+class CountingExchange(SimulatedExchange):
+    # Registra quantas requisições estavam em andamento ao mesmo tempo
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.max_active = 0
+
+    async def fetch_ohlcv(self, *args, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            return await super().fetch_ohlcv(*args, **kwargs)
+        finally:
+            self.active -= 1
+
+def make_manager(exchange, **kwargs):
+    return AsyncExchangeManager('simulated', exchange=exchange, backoff=0.0, **kwargs)
+
+def test_retries_network_errors():
+    sim = SimulatedExchange()
+    sim.fail_next(2)
+    df = asyncio.run(make_manager(sim, max_retries=3).fetch_ohlcv('BTC/USDT', '1m', limit=50))
+    assert len(df) == 50
+    assert len(sim.calls) == 3
+
+def test_gives_up_after_max_retries():
+    sim = SimulatedExchange()
+    sim.fail_next(3)
+    with pytest.raises(ccxt.NetworkError):
+        asyncio.run(make_manager(sim, max_retries=2).fetch_ohlcv('BTC/USDT', '1m', limit=50))
+    assert len(sim.calls) == 3
+
+def test_exchange_errors_are_not_retried():
+    sim = SimulatedExchange()
+    sim.fail_next(1, ccxt.BadSymbol)
+    with pytest.raises(ccxt.BadSymbol):
+        asyncio.run(make_manager(sim).fetch_ohlcv('BTC/USDT', '1m', limit=50))
+    assert len(sim.calls) == 1
+
+def test_fetch_many_bounds_concurrency():
+    sim = CountingExchange(latency=0.01)
+    symbols = [f'S{i}/USDT' for i in range(10)]
+    frames = asyncio.run(make_manager(sim, max_concurrency=3).fetch_many(symbols, ['1m', '5m'], limit=20))
+    assert set(frames) == {(s, tf) for s in symbols for tf in ('1m', '5m')}
+    assert all(len(df) == 20 for df in frames.values())
+    assert sim.max_active == 3
+
+def test_fetch_many_returns_empty_frame_on_failure():
+    sim = SimulatedExchange()
+    sim.fail_next(1, ccxt.BadSymbol)
+    frames = asyncio.run(make_manager(sim, max_concurrency=1).fetch_many(['A/USDT', 'B/USDT'], ['1m'], limit=10))
+    assert frames[('A/USDT', '1m')].empty
+    assert len(frames[('B/USDT', '1m')]) == 10
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.backtest_engine import run_backtest, run_backtest_loop, run_backtest_signals
+from core.strategies import SignalResult
+from benchmarks.synthetic import make_ohlcv
+
+def with_signal(signal):
+    df = make_ohlcv(len(signal))
+    df['signal'] = np.asarray(signal, dtype=np.int8)
+    return df
+
+def assert_equivalent(df, initial_capital=1000, fee_pct=0.001):
+    res_new, metrics_new, trades_new = run_backtest(df, initial_capital, fee_pct)
+    res_old, metrics_old, trades_old = run_backtest_loop(df, initial_capital, fee_pct)
+
+    np.testing.assert_allclose(res_new['equity'].to_numpy(), res_old['equity'].to_numpy(), rtol=1e-9)
+    assert metrics_new['Num Trades'] == metrics_old['Num Trades']
+    np.testing.assert_allclose(metrics_new['Final Equity'], metrics_old['Final Equity'], rtol=1e-9)
+    np.testing.assert_allclose(metrics_new['Total Return %'], metrics_old['Total Return %'], rtol=1e-9, atol=1e-12)
+    assert list(trades_new.columns) == list(trades_old.columns)
+    if not trades_old.empty:
+        assert (trades_new['type'] == trades_old['type']).all()
+        assert (trades_new['date'] == trades_old['date']).all()
+        np.testing.assert_allclose(trades_new['capital'], trades_old['capital'], rtol=1e-9)
+        pd.testing.assert_series_equal(trades_new['pnl'], trades_old['pnl'], rtol=1e-9)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_signals_match_loop(seed):
+    rng = np.random.default_rng(seed)
+    assert_equivalent(with_signal(rng.choice([-1, 0, 1], size=500, p=[0.1, 0.8, 0.1])))
+
+def test_no_trades():
+    df = with_signal(np.zeros(200))
+    assert_equivalent(df)
+    _, metrics, trades = run_backtest(df)
+    assert metrics['Num Trades'] == 0
+    assert trades.empty
+
+def test_only_sells_never_enters():
+    assert_equivalent(with_signal(-np.ones(200)))
+
+def test_open_position_at_end():
+    signal = np.zeros(200)
+    signal[[10, 50, 120]] = [1, -1, 1]
+    df = with_signal(signal)
+    assert_equivalent(df)
+    _, _, trades = run_backtest(df)
+    assert list(trades['type']) == ['buy', 'sell', 'buy']
+
+def test_buy_on_first_bar():
+    signal = np.zeros(200)
+    signal[[0, 100]] = [1, -1]
+    assert_equivalent(with_signal(signal))
+
+def test_repeated_signals_are_ignored():
+    signal = np.zeros(200)
+    signal[[5, 6, 7, 40, 41, 90]] = [1, 1, 1, -1, -1, 1]
+    assert_equivalent(with_signal(signal))
+
+def test_no_valid_bars_raises_value_error():
+    df = make_ohlcv(100)
+    warming = SignalResult(np.zeros(len(df), dtype=np.int8), {'ma': np.full(len(df), np.nan)}, df.index)
+    with pytest.raises(ValueError, match="Nenhuma barra válida"):
+        run_backtest_signals(df, warming)
+    with pytest.raises(ValueError, match="Nenhuma barra válida"):
+        run_backtest(with_signal(np.zeros(len(df)))[:0])
@@ -0,0 +1,105 @@
+import os
+import threading
+
+import numpy as np
+
+from core.candle_store import OHLCV_DTYPE, CandleStore
+from core.exchange_manager import ExchangeManager
+from tests.fakes import HistoryClient
+
+KEY, SYMBOL, TF = 'fake_swap', 'BTC/USDT', '1m'
+
+def rows(start, n, close=1.0):
+    return [[(start + i) * 60_000, 1.0, 2.0, 0.5, close + i, 10.0] for i in range(n)]
+
+def reference(*batches):
+    # Resultado esperado: ordenado por timestamp, a última versão de cada barra vence
+    merged = {}
+    for batch in batches:
+        for row in batch:
+            merged[row[0]] = tuple(row)
+    return np.array([merged[ts] for ts in sorted(merged)], dtype=OHLCV_DTYPE)
+
+def test_merge_deduplicates_and_keeps_newest(tmp_path):
+    store = CandleStore(str(tmp_path))
+    a, b = rows(0, 10), rows(5, 10, close=100.0)
+    assert store.merge(KEY, SYMBOL, TF, a) == 10
+    assert store.merge(KEY, SYMBOL, TF, b) == 5
+    np.testing.assert_array_equal(store.load_array(KEY, SYMBOL, TF), reference(a, b))
+
+def test_tail_merge_appends_in_place(tmp_path):
+    store = CandleStore(str(tmp_path))
+    batches = [rows(0, 500)]
+    store.merge(KEY, SYMBOL, TF, batches[0])
+    path = store._path(KEY, SYMBOL, TF)
+    inode = os.stat(path).st_ino
+    for i in range(20):
+        # Cada sincronização reenvia o candle em formação com outro close e traz barras novas
+        batch = rows(499 + i * 3, 4, close=1000.0 + i)
+        batches.append(batch)
+        assert store.merge(KEY, SYMBOL, TF, batch) == 3
+    np.testing.assert_array_equal(np.load(path), reference(*batches))
+    # Mesmo arquivo (gravado no fim), não uma cópia trocada com os.replace
+    assert os.stat(path).st_ino == inode
+    assert [n for n in os.listdir(os.path.dirname(path)) if n.endswith('.tmp.npy')] == []
+
+def test_older_bars_rewrite_history(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.merge(KEY, SYMBOL, TF, rows(100, 50))
+    assert store.merge(KEY, SYMBOL, TF, rows(40, 70)) == 60
+    np.testing.assert_array_equal(store.load_array(KEY, SYMBOL, TF), reference(rows(100, 50), rows(40, 70)))
+
+def test_reads_do_not_create_directories(tmp_path):
+    store = CandleStore(str(tmp_path / 'candles'))
+    assert len(store.load_array(KEY, SYMBOL, TF)) == 0
+    assert store.timeframes(KEY, SYMBOL) == []
+    assert store.bounds(KEY, SYMBOL, TF) == (None, None)
+    assert not os.path.exists(tmp_path / 'candles')
+
+def test_concurrent_merges_do_not_lose_bars(tmp_path):
+    store = CandleStore(str(tmp_path))
+    batches = [rows(i * 25, 30) for i in range(16)]
+    # Metade das threads escreve à frente (append), metade atrás (reescrita)
+    order = batches[8:] + batches[:8][::-1]
+    threads = [threading.Thread(target=store.merge, args=(KEY, SYMBOL, TF, batch)) for batch in order]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stored = store.load_array(KEY, SYMBOL, TF)
+    np.testing.assert_array_equal(stored['timestamp'], np.arange(0, 15 * 25 + 30) * 60_000)
+
+def make_manager(tmp_path, page_limit=100):
+    manager = ExchangeManager('fake', exchange=HistoryClient(), store=CandleStore(str(tmp_path)))
+    manager.page_limit = page_limit
+    manager._markets_thread.join(5)
+    return manager
+
+def test_sync_downloads_only_the_tail(tmp_path):
+    manager = make_manager(tmp_path)
+    client = manager.exchange
+    manager.sync_ohlcv(SYMBOL, TF, 100)
+    first, last = manager.store.bounds(manager.store_key, SYMBOL, TF)
+
+    client.requests.clear()
+    client.now += 5 * 60_000
+    manager.sync_ohlcv(SYMBOL, TF, 100)
+    assert client.requests == [(TF, last, 100)]
+    stored = manager.store.load_array(manager.store_key, SYMBOL, TF)
+    assert len(stored) == 105
+    # O candle que estava em formação foi atualizado com os valores finais
+    expected = client.bars(TF, first, client.now)
+    np.testing.assert_array_equal(stored, expected)
+
+def test_sync_pages_backwards_until_limit(tmp_path):
+    manager = make_manager(tmp_path, page_limit=100)
+    client = manager.exchange
+    manager.sync_ohlcv(SYMBOL, TF, 350)
+    stored = manager.store.load_array(manager.store_key, SYMBOL, TF)
+    assert len(stored) == 350
+    np.testing.assert_array_equal(stored, client.bars(TF, int(stored['timestamp'][0]), client.now))
+    assert [since is None for _, since, _ in client.requests] == [True, False, False, False]
+    # Com o histórico completo, a sincronização seguinte só busca a cauda
+    client.requests.clear()
+    manager.sync_ohlcv(SYMBOL, TF, 350)
+    assert len(client.requests) == 1
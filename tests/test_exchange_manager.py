@@ -0,0 +1,127 @@
+import threading
+
+import ccxt
+import numpy as np
+
+from core.candle_store import CandleStore
+from core.exchange_manager import ExchangeManager
+from tests.fakes import HistoryClient
+
+MARKETS = {'BTC/USDT': {
+    'precision': {'amount': 0.001, 'price': 0.1},
+    'limits': {'amount': {'min': 0.001, 'max': 100}, 'cost': {'min': 5}},
+}}
+
+class FakeClient:
+    """Cliente ccxt síncrono mínimo: registra as ordens e conta as cargas de mercados."""
+    def __init__(self, markets=None, error=None, gate=None):
+        self.markets = markets
+        self.error = error
+        self.gate = gate
+        self.load_calls = 0
+        self.orders = []
+
+    def load_markets(self, reload=False):
+        self.load_calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error('mercados indisponíveis')
+        return self.markets
+
+    def create_market_order(self, symbol, side, amount):
+        self.orders.append((symbol, side, amount))
+        return {'symbol': symbol, 'side': side, 'amount': amount, 'status': 'closed'}
+
+def make_manager(client):
+    manager = ExchangeManager('fake', exchange=client)
+    manager._markets_thread.join(5)
+    return manager
+
+def test_orders_go_out_when_markets_fail_to_load():
+    client = FakeClient(error=ccxt.ExchangeNotAvailable)
+    manager = make_manager(client)
+
+    first = manager.create_order('BTC/USDT', 'buy', 0.0123)
+    second = manager.create_order('BTC/USDT', 'sell', 0.0123)
+    assert first is not None and second is not None
+    assert client.orders == [('BTC/USDT', 'buy', 0.0123), ('BTC/USDT', 'sell', 0.0123)]
+    # Uma única carga (em background); as ordens não repetem a tentativa
+    assert client.load_calls == 1
+
+def test_order_does_not_wait_for_slow_markets():
+    gate = threading.Event()
+    client = FakeClient(markets=MARKETS, gate=gate)
+    manager = ExchangeManager('fake', exchange=client)
+    try:
+        assert manager.create_order('BTC/USDT', 'buy', 0.0123) is not None
+        assert client.orders == [('BTC/USDT', 'buy', 0.0123)]
+    finally:
+        gate.set()
+    manager._markets_thread.join(5)
+
+    # Com a tabela carregada, a quantidade é arredondada à precisão do mercado
+    manager.create_order('BTC/USDT', 'buy', 0.0129)
+    assert client.orders[-1] == ('BTC/USDT', 'buy', 0.012)
+    assert client.load_calls == 1
+
+def test_prepare_order_checks_limits():
+    manager = make_manager(FakeClient(markets=MARKETS))
+    assert manager.prepare_order('BTC/USDT', 0.01234, 30000.04) == (0.012, 30000.0)
+    assert manager.create_order('BTC/USDT', 'buy', 0.0001) is None
+    assert manager.create_order('BTC/USDT', 'buy', 0.001, ref_price=1000.0) is None
+    assert manager.exchange.orders == []
+
+def test_failed_load_is_retried_after_interval():
+    client = FakeClient(error=ccxt.ExchangeNotAvailable)
+    manager = make_manager(client)
+    client.error = None
+    client.markets = MARKETS
+    assert manager.load_markets() is None
+
+    manager._markets_tried_at -= manager.markets_retry + 1
+    manager.load_markets()
+    manager._markets_thread.join(5)
+    assert manager.load_markets() is MARKETS
+    assert client.load_calls == 2
+
+def make_store_manager(tmp_path):
+    manager = ExchangeManager('fake', exchange=HistoryClient(), store=CandleStore(str(tmp_path / 'candles')))
+    manager._markets_thread.join(5)
+    return manager
+
+def test_derivable_from_picks_largest_affordable_base(tmp_path):
+    manager = make_store_manager(tmp_path)
+    manager.derive_max_bars = 5000
+    assert manager.derivable_from('BTC/USDT', '1h', 100) is None
+    for tf in ('1m', '5m', '4h'):
+        manager.sync_ohlcv('BTC/USDT', tf, 10)
+    assert manager.derivable_from('BTC/USDT', '1h', 100) == '5m'
+    assert manager.derivable_from('BTC/USDT', '15m', 100) == '5m'
+    assert manager.derivable_from('BTC/USDT', '1d', 100) == '4h'
+    assert manager.derivable_from('BTC/USDT', '5m', 900) == '1m'
+    # Acima de derive_max_bars barras base: baixa o timeframe pedido
+    assert manager.derivable_from('BTC/USDT', '5m', 1000) is None
+    assert manager.derivable_from('BTC/USDT', '1h', 1000) is None
+    assert manager.derivable_from('BTC/USDT', '4h', 10) == '5m'
+
+def test_switching_timeframes_reuses_stored_history(tmp_path):
+    manager = make_store_manager(tmp_path)
+    client = manager.exchange
+    limit = 500
+    downloaded = {}
+    for tf in ('1m', '5m', '15m', '1h', '4h', '1d', '1h', '4h'):
+        client.requests.clear()
+        df = manager.fetch_ohlcv('BTC/USDT', tf, limit)
+        assert len(df) == limit
+        direct = client.bars(tf, int(df['timestamp'].iloc[0].value // 10**6), client.now)
+        np.testing.assert_allclose(df['close'].to_numpy(), direct['close'])
+        downloaded[tf] = downloaded.get(tf, 0) + sum(1 for r in client.requests if r[0] == tf)
+
+    # Só o 1m e o 4h (1m -> 4h passaria de derive_max_bars) são baixados; os demais são agregados
+    assert set(tf for tf, n in downloaded.items() if n) == {'1m', '4h'}
+    # Na segunda visita ao 4h basta a cauda
+    client.requests.clear()
+    manager.fetch_ohlcv('BTC/USDT', '4h', limit)
+    [(tf, since, _)] = client.requests
+    assert tf == '4h' and since is not None
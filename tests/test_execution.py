@@ -0,0 +1,112 @@
+import asyncio
+
+import ccxt
+import pytest
+
+from core.execution import ExecutionService
+from core.sim_exchange import SimulatedExchange
+
+SYMBOL = 'BTC/USDT'
+
+def run(coro):
+    return asyncio.run(coro)
+
+def order_calls(sim):
+    return [c for c in sim.calls if c[0] == 'create_order']
+
+def test_same_client_id_creates_one_order():
+    sim = SimulatedExchange(latency=0.01)
+    service = ExecutionService(sim, backoff=0.0)
+
+    async def main():
+        # Concorrentes e repetidas com a mesma chave
+        first = await asyncio.gather(*(service.submit(SYMBOL, 'buy', 0.1, client_order_id='k1') for _ in range(5)))
+        again = await service.submit(SYMBOL, 'buy', 0.1, client_order_id='k1')
+        return first, again
+
+    first, again = run(main())
+    assert len(sim.orders) == 1
+    assert len(order_calls(sim)) == 1
+    assert {o['id'] for o in first} == {again['id']}
+
+def test_lost_ack_is_recovered_without_duplicate():
+    sim = SimulatedExchange()
+    service = ExecutionService(sim, backoff=0.0)
+    sim.lose_ack_next()
+
+    order = run(service.submit(SYMBOL, 'buy', 0.1, client_order_id='k1'))
+    assert len(sim.orders) == 1
+    assert order['clientOrderId'] == 'k1' and order['status'] == 'closed'
+    assert service.orders['k1']['id'] == order['id']
+
+def test_lost_ack_and_failed_lookup_resolve_by_duplicate_id():
+    sim = SimulatedExchange()
+    service = ExecutionService(sim, backoff=0.0)
+    sim.lose_ack_next()
+
+    async def main():
+        # O ack se perde e a consulta seguinte também falha: o reenvio bate em DuplicateOrderId
+        original = sim.fetch_order
+        failures = iter([True])
+
+        async def flaky_fetch(id, symbol=None, params=None):
+            if next(failures, False):
+                raise ccxt.NetworkError('consulta falhou')
+            return await original(id, symbol, params)
+        sim.fetch_order = flaky_fetch
+        return await service.submit(SYMBOL, 'sell', 0.2, client_order_id='k2')
+
+    order = run(main())
+    assert len(sim.orders) == 1
+    assert len(order_calls(sim)) == 2
+    assert order['clientOrderId'] == 'k2'
+
+def test_network_errors_are_retried():
+    sim = SimulatedExchange()
+    service = ExecutionService(sim, max_retries=3, backoff=0.0)
+    sim.fail_next(2)
+
+    order = run(service.submit(SYMBOL, 'buy', 0.1))
+    assert order['status'] == 'closed'
+    assert len(sim.orders) == 1
+    assert len(order_calls(sim)) == 2   # fetch_order absorve uma das falhas
+
+def test_gives_up_after_max_retries():
+    sim = SimulatedExchange()
+    service = ExecutionService(sim, max_retries=1, backoff=0.0)
+    # create_order e a consulta falham em todas as tentativas
+    sim.fail_next(4)
+
+    with pytest.raises(ccxt.NetworkError):
+        run(service.submit(SYMBOL, 'buy', 0.1, client_order_id='k3'))
+    assert sim.orders == []
+    assert 'k3' not in service.orders and 'k3' not in service._pending
+
+def test_rejected_order_is_not_retried():
+    sim = SimulatedExchange()
+    service = ExecutionService(sim, backoff=0.0)
+    sim.fail_next(1, ccxt.InsufficientFunds)
+
+    with pytest.raises(ccxt.InsufficientFunds):
+        run(service.submit(SYMBOL, 'buy', 0.1))
+    assert len(order_calls(sim)) == 1
+
+def test_reconcile_fills_open_limit_order():
+    sim = SimulatedExchange(fill_delay=0.05)
+    service = ExecutionService(sim, backoff=0.0)
+
+    async def main():
+        order = await service.submit(SYMBOL, 'buy', 0.1, price=29000.0, order_type='limit', client_order_id='k4')
+        assert order['status'] == 'open'
+        assert await service.reconcile() == {'k4': service.orders['k4']}
+        assert service.orders['k4']['status'] == 'open'
+        await asyncio.sleep(0.06)
+        sim.fail_next(1)   # falha de rede na reconciliação: a ordem continua aberta
+        await service.reconcile()
+        assert service.orders['k4']['status'] == 'open'
+        return await service.reconcile()
+
+    updated = run(main())
+    assert updated['k4']['status'] == 'closed'
+    assert service.fill_latency.summary()['count'] == 1
+    assert service.ack_latency.summary()['count'] == 1
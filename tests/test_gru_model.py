@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from benchmarks.bench_gru_data import prepare_data_loop
+from benchmarks.synthetic import make_ohlcv
+from core.gru_model import GRUModel
+from core.indicators import FeatureCache, add_indicators
+from core.strategies import StrategyEngine
+
+LOOKBACK = 30
+
+@pytest.fixture(scope='module')
+def df():
+    return make_ohlcv(600)
+
+@pytest.fixture(scope='module')
+def reference(df):
+    return prepare_data_loop(GRUModel(lookback=LOOKBACK), df)
+
+def collect(dataset):
+    batches = list(dataset.as_numpy_iterator())
+    return np.concatenate([X for X, _ in batches]), np.concatenate([y for _, y in batches])
+
+def test_prepare_data_matches_loop(df, reference):
+    X_ref, y_ref = reference
+    X, y, _ = GRUModel(lookback=LOOKBACK).prepare_data(df)
+    assert X.shape == X_ref.shape == (len(df) - LOOKBACK, LOOKBACK, 1)
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+
+def test_make_dataset_matches_loop(df, reference):
+    X_ref, y_ref = reference
+    X, y = collect(GRUModel(lookback=LOOKBACK).make_dataset(df, batch_size=64))
+    np.testing.assert_allclose(X, X_ref, rtol=1e-6, atol=1e-7)
+    np.testing.assert_allclose(y, y_ref, rtol=1e-6, atol=1e-7)
+
+def test_make_dataset_slices_windows(df, reference):
+    X_ref, y_ref = reference
+    X, y = collect(GRUModel(lookback=LOOKBACK).make_dataset(df, batch_size=50, start=100, end=420))
+    np.testing.assert_allclose(X, X_ref[100:420], rtol=1e-6, atol=1e-7)
+    np.testing.assert_allclose(y, y_ref[100:420], rtol=1e-6, atol=1e-7)
+
+def trained(df, features=None):
+    gru = GRUModel(lookback=LOOKBACK, features=features)
+    gru.build_model(units=8, layers=1)
+    X, y, _ = gru.prepare_data(df)
+    gru.train(X, y, epochs=1, batch_size=128)
+    return gru
+
+def direct_prediction(gru, df, rows, i):
+    # Previsão da janela que termina na linha i, chamando o modelo sem o caminho em lote
+    inputs, _ = gru._scaled_inputs(df, 'close', fit=False)
+    pos = int(np.searchsorted(rows, i))
+    window = inputs[pos - LOOKBACK + 1:pos + 1][None].astype(np.float32)
+    return gru.scaler.inverse_transform(gru.model(window, training=False).numpy())[0, 0]
+
+def test_predict_next_close_is_aligned_with_rows(df):
+    gru = trained(df)
+    next_close = gru.predict_next_close(df)
+    assert len(next_close) == len(df)
+    assert np.isnan(next_close[:LOOKBACK - 1]).all() and not np.isnan(next_close[LOOKBACK - 1:]).any()
+    rows = np.arange(len(df))
+    for i in (LOOKBACK - 1, 250, len(df) - 1):
+        assert next_close[i] == pytest.approx(direct_prediction(gru, df, rows, i), rel=1e-5)
+
+    # Recorte do app: previsões do conjunto de teste = predict sobre as janelas de teste de prepare_data
+    split = int((len(df) - LOOKBACK) * 0.8)
+    X, _, _ = gru.prepare_data(df, fit=False)
+    expected = gru.scaler.inverse_transform(gru.predict(X[split:]))[:, 0]
+    np.testing.assert_allclose(next_close[LOOKBACK + split - 1:-1], expected, rtol=1e-5)
+    assert len(df['close'].to_numpy()[LOOKBACK + split:]) == len(expected)
+
+def test_predict_next_close_skips_indicator_warm_up(df):
+    data = add_indicators(df.copy(), cache=FeatureCache())
+    gru = trained(data, features=['close', 'SMA_50'])
+    next_close = gru.predict_next_close(data)
+    rows = np.flatnonzero(data[['close', 'SMA_50']].notna().all(axis=1).to_numpy())
+    first = rows[LOOKBACK - 1]
+    assert np.isnan(next_close[:first]).all() and not np.isnan(next_close[first:]).any()
+    for i in (first, 400, len(data) - 1):
+        assert next_close[i] == pytest.approx(direct_prediction(gru, data, rows, i), rel=1e-5)
+
+def test_gru_signal_compares_prediction_with_close(df):
+    gru = trained(df)
+    predicted = gru.predict_next_close(df)
+    close = df['close'].to_numpy()
+    result = StrategyEngine(df, cache=FeatureCache()).gru_signal(gru, threshold=0.001)
+    np.testing.assert_array_equal(result.aux['predicted_close'], predicted)
+    expected = np.where(predicted > close * 1.001, 1, np.where(predicted < close * 0.999, -1, 0))
+    np.testing.assert_array_equal(result.signal, expected)
+    # As barras sem previsão ficam fora do backtest
+    np.testing.assert_array_equal(result.valid_mask(), ~np.isnan(predicted))
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from core.indicators import ATR, SMA, FeatureCache, add_indicators, compute_features, data_version
+from benchmarks.synthetic import make_ohlcv
+
+@pytest.fixture
+def df():
+    return make_ohlcv(1000)
+
+def test_reindexed_slice_is_aligned(df):
+    cache = FeatureCache()
+    part = df.iloc[200:]
+    first = add_indicators(part.copy(), [SMA(7)], cache)
+    second = add_indicators(part.reset_index(drop=True), [SMA(7)], cache)
+    expected = add_indicators(part.reset_index(drop=True), [SMA(7)], FeatureCache())
+    assert first['SMA_7'].notna().sum() == second['SMA_7'].notna().sum() == len(part) - 6
+    np.testing.assert_array_equal(second['SMA_7'].to_numpy(), expected['SMA_7'].to_numpy())
+
+def test_same_close_different_high_low_is_not_stale(df):
+    cache = FeatureCache()
+    wider = df.copy()
+    wider['high'] *= 1.01
+    wider['low'] *= 0.99
+    atr = compute_features(df, [ATR(14)], cache)['ATR']
+    atr_wider = compute_features(wider, [ATR(14)], cache)['ATR']
+    assert not np.allclose(atr[20:], atr_wider[20:])
+    np.testing.assert_allclose(atr_wider, compute_features(wider, [ATR(14)], FeatureCache())['ATR'],
+                               equal_nan=True)
+
+def test_version_changes_with_interior_values(df):
+    other = df.copy()
+    other.loc[500, 'close'] += 1
+    assert data_version(df) != data_version(other)
+    assert data_version(df) == data_version(df.copy())
+
+def test_version_follows_appended_candles(df):
+    part = df.iloc[:500].copy()
+    version = data_version(part)
+    part.loc[500] = df.loc[500]
+    assert data_version(part) != version
@@ -0,0 +1,84 @@
+import asyncio
+
+import ccxt
+
+from core.execution import ExecutionService
+from core.live_runner import LiveRunner
+from core.sim_exchange import SimulatedExchange
+from core.strategies import StreamingMACross
+
+def make_runner(sim, executor=None, timeframe='1m', **kwargs):
+    return LiveRunner(sim, executor or ExecutionService(sim, backoff=0.0), 'BTC/USDT', timeframe, StreamingMACross(2, 4), 0.001,
+                      warmup_bars=50, **kwargs)
+
+class NewUpdatesExchange(SimulatedExchange):
+    """Como o ccxt.pro com newUpdates=True: cada watch_ohlcv devolve só o candle em formação."""
+    async def watch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        return (await super().watch_ohlcv(symbol, timeframe, since, limit, params))[-1:]
+
+async def collect(runner, n):
+    await runner.warm_up()
+    start = runner.last_closed_ts
+    out = []
+    async for candle in runner.stream():
+        out.append(candle)
+        if len(out) == n:
+            return start, out
+
+def assert_consecutive(sim, start, candles, tf_ms=60_000):
+    assert [c['timestamp'] for c in candles] == [start + tf_ms * (i + 1) for i in range(len(candles))]
+    # Valores finais do candle fechado, não um instantâneo de quando estava em formação
+    expected = {row[0]: row[4] for row in sim.candles('BTC/USDT', '1m', limit=200)}
+    assert all(c['close'] == expected[c['timestamp']] for c in candles)
+
+def test_websocket_with_only_forming_candle_emits_closed_bars():
+    sim = NewUpdatesExchange()
+    runner = make_runner(sim)
+    start, candles = asyncio.run(asyncio.wait_for(collect(runner, 6), timeout=10))
+    assert_consecutive(sim, start, candles)
+    assert runner.use_websocket
+
+def test_polling_backfills_bars_closed_between_polls():
+    # Cada poll avança 5 barras: limit=3 sozinho pularia candles
+    sim = SimulatedExchange(tick_ms=5 * 60_000)
+    runner = make_runner(sim, use_websocket=False, poll_interval=0)
+    start, candles = asyncio.run(asyncio.wait_for(collect(runner, 12), timeout=10))
+    assert_consecutive(sim, start, candles)
+
+def test_polling_fallback_advances_and_processes_bars():
+    sim = SimulatedExchange()
+    runner = make_runner(sim, use_websocket=False, poll_interval=0)
+    processed = asyncio.run(asyncio.wait_for(runner.run(max_bars=5), timeout=10))
+    assert processed == 5
+    assert not any(call[0] == 'watch_ohlcv' for call in sim.calls)
+
+def test_websocket_failure_switches_to_polling():
+    sim = SimulatedExchange()
+
+    async def broken_watch(*args, **kwargs):
+        raise ConnectionError('ws caiu')
+    sim.watch_ohlcv = broken_watch
+
+    runner = make_runner(sim, poll_interval=0)
+    assert asyncio.run(asyncio.wait_for(runner.run(max_bars=3), timeout=10)) == 3
+    assert runner.use_websocket is False
+
+def test_market_fill_uses_streamed_timeframe_bar():
+    sim = SimulatedExchange()
+    candles = asyncio.run(sim.watch_ohlcv('BTC/USDT', '1h'))
+    order = sim.create_market_order('BTC/USDT', 'buy', 0.001)
+    # Preço da ordem = close do candle de 1h em formação
+    assert order['price'] == candles[-1][4]
+
+def test_rejected_order_keeps_position_and_stream_alive():
+    sim = SimulatedExchange()
+    runner = make_runner(sim, executor=ExecutionService(sim, max_retries=0, backoff=0.0))
+    sim.fail_next(1, ccxt.InsufficientFunds)
+    runner.strategy.update = lambda candle: 1
+    candle = {'timestamp': 0, 'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 1.0}
+
+    assert asyncio.run(runner.on_bar(candle)) is None
+    assert runner.position == 0 and runner.fills == []
+    # A barra seguinte envia normalmente
+    assert asyncio.run(runner.on_bar(candle))['status'] == 'closed'
+    assert runner.position == 1
@@ -0,0 +1,77 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_ohlcv
+from core.backtest_engine import run_backtest_signals
+from core.metrics import MIN_CAGR_DAYS, compute_metrics
+from core.strategies import StrategyEngine
+
+def backtest(n_bars, freq='1min', fast=9, slow=21):
+    df = make_ohlcv(n_bars, freq=freq)
+    return run_backtest_signals(df, StrategyEngine(df).ma_cross_signals(fast, slow))
+
+def max_drawdown_loop(equity, initial_capital):
+    peak, worst = initial_capital, 0.0
+    for value in equity:
+        peak = max(peak, value)
+        worst = min(worst, value / peak - 1)
+    return worst * 100
+
+@pytest.fixture(scope='module')
+def result():
+    return backtest(5000)
+
+def test_drawdown_matches_running_max_loop(result):
+    df_res, metrics, _ = result
+    assert metrics['Max Drawdown %'] == pytest.approx(max_drawdown_loop(df_res['equity'], 1000))
+
+def test_trade_metrics_match_trades_frame(result):
+    df_res, metrics, trades = result
+    buys = trades[trades['type'] == 'buy'].reset_index(drop=True)
+    sells = trades[trades['type'] == 'sell'].reset_index(drop=True)
+    # Resultado de cada trade fechado, com as taxas: capital após a venda - capital antes da compra
+    pnl = sells['capital'].to_numpy() - buys['capital'].to_numpy()[:len(sells)]
+    assert metrics['Num Trades'] == (len(buys) + len(sells)) // 2
+    assert metrics['Win Rate %'] == pytest.approx((pnl > 0).mean() * 100)
+    assert metrics['Profit Factor'] == pytest.approx(pnl[pnl > 0].sum() / -pnl[pnl < 0].sum())
+
+    bar = pd.Series(np.arange(len(df_res)), index=df_res['timestamp'])
+    durations = bar[sells['date']].to_numpy() - bar[buys['date'][:len(sells)]].to_numpy()
+    assert metrics['Avg Trade Duration'] == pytest.approx(durations.mean())
+
+def test_return_ratios_match_reference(result):
+    df_res, metrics, _ = result
+    equity = np.concatenate(([1000.0], df_res['equity'].to_numpy()))
+    returns = np.diff(equity) / equity[:-1]
+    ppy = 365 * 24 * 60  # barras de 1m por ano
+    assert metrics['Sharpe'] == pytest.approx(returns.mean() / returns.std() * np.sqrt(ppy))
+    downside = np.sqrt(np.mean(np.where(returns < 0, returns, 0.0) ** 2))
+    assert metrics['Sortino'] == pytest.approx(returns.mean() / downside * np.sqrt(ppy))
+    assert metrics['Total Return %'] == pytest.approx((equity[-1] / 1000 - 1) * 100)
+
+def test_exposure_counts_bars_in_position():
+    position = np.array([0, 1, 1, 1, 0, 0, 1, 1, 0, 0])
+    equity = np.full(10, 1000.0)
+    metrics = compute_metrics(equity, position, ppy=365)
+    assert metrics['Exposure %'] == 50.0
+    assert metrics['Avg Trade Duration'] == 2.5
+    assert metrics['Max Drawdown Duration'] == 0
+
+def test_cagr_is_nan_on_short_windows():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        # 500 barras de 1m: anualizar daria ~1050 no expoente
+        _, metrics, _ = backtest(500)
+        assert np.isnan(metrics['CAGR %'])
+        rising = compute_metrics(np.linspace(1000, 5000, 500), np.ones(500), ppy=525_600)
+        assert np.isnan(rising['CAGR %'])
+
+def test_cagr_annualises_long_windows():
+    df_res, metrics, _ = backtest(3 * 365, freq='1D', fast=5, slow=20)
+    years = len(df_res) / 365
+    assert len(df_res) >= MIN_CAGR_DAYS
+    expected = ((df_res['equity'].iloc[-1] / 1000) ** (1 / years) - 1) * 100
+    assert metrics['CAGR %'] == pytest.approx(expected)
@@ -0,0 +1,63 @@
+import pytest
+
+from benchmarks.synthetic import make_ohlcv
+from core.gru_model import GRUModel
+from core.model_registry import ModelRegistry, load_or_train_gru
+
+# Modelo mínimo para o teste ser rápido
+FAST = dict(lookback=30, units=8, layers=1, epochs=1, fine_tune_epochs=1)
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / 'models'))
+
+@pytest.fixture
+def datasets(monkeypatch):
+    # Registra (start, end, fit) de cada make_dataset chamado no treino
+    calls = []
+    original = GRUModel.make_dataset
+
+    def recording(self, df, target_col='close', batch_size=32, start=None, end=None, shuffle=False, fit=True):
+        calls.append((start, end, fit))
+        return original(self, df, target_col, batch_size, start, end, shuffle, fit)
+    monkeypatch.setattr(GRUModel, 'make_dataset', recording)
+    return calls
+
+def test_trained_then_cached(registry, datasets):
+    df = make_ohlcv(300)
+    gru, status = load_or_train_gru(df, 'BTC/USDT', '1m', registry=registry, **FAST)
+    assert status == 'trained'
+    assert datasets == [(None, 270, True)]
+
+    again, status = load_or_train_gru(df, 'BTC/USDT', '1m', registry=registry, **FAST)
+    assert (status, again) == ('cached', gru)
+    # Outro registry lê do disco: mesmos dados, sem treinar
+    loaded, status = load_or_train_gru(df, 'BTC/USDT', '1m', registry=ModelRegistry(registry.root), **FAST)
+    assert status == 'cached' and loaded is not gru
+    assert len(datasets) == 1
+
+def test_fine_tunes_only_windows_with_new_targets(registry, datasets):
+    df = make_ohlcv(320)
+    load_or_train_gru(df.iloc[:300], 'BTC/USDT', '1m', registry=registry, **FAST)
+    gru, status = load_or_train_gru(df, 'BTC/USDT', '1m', registry=registry, **FAST)
+    assert status == 'fine_tuned'
+    # Janela 270 é a primeira cujo alvo (linha 300) é um candle novo; a última é a 289
+    assert datasets[-1] == (270, 290, False)
+    assert load_or_train_gru(df, 'BTC/USDT', '1m', registry=registry, **FAST)[1] == 'cached'
+
+def test_train_end_limits_windows(registry, datasets):
+    df = make_ohlcv(300)
+    load_or_train_gru(df, 'BTC/USDT', '1m', train_end=200, registry=registry, **FAST)
+    assert datasets[-1] == (None, 200, True)
+    # Mesmo treino limitado: candles depois do split não invalidam o modelo
+    longer = make_ohlcv(320)
+    assert load_or_train_gru(longer, 'BTC/USDT', '1m', train_end=200, registry=registry, **FAST)[1] == 'cached'
+    # Split maior: fine-tuning das janelas 200..239
+    _, status = load_or_train_gru(df, 'BTC/USDT', '1m', train_end=240, registry=registry, **FAST)
+    assert status == 'fine_tuned' and datasets[-1] == (200, 240, False)
+
+def test_force_and_other_keys_train_from_scratch(registry, datasets):
+    df = make_ohlcv(300)
+    load_or_train_gru(df, 'BTC/USDT', '1m', registry=registry, **FAST)
+    assert load_or_train_gru(df, 'BTC/USDT', '1m', force=True, registry=registry, **FAST)[1] == 'trained'
+    assert load_or_train_gru(df, 'BTC/USDT', '5m', registry=registry, **FAST)[1] == 'trained'
@@ -0,0 +1,56 @@
+import numpy as np
+import optuna
+import pytest
+
+from core.backtest_engine import run_backtest_signals
+from core.indicators import FeatureCache, add_indicators
+from core.optimizer import _valid_close, data_fingerprint, evaluate_ma_grid, objective_ma, objective_ma_pruned, walk_forward
+from core.strategies import RollingMeanCache, StrategyEngine
+from benchmarks.synthetic import make_ohlcv
+
+@pytest.fixture(scope='module')
+def df():
+    # Com as colunas de indicadores (NaN no início), como o app entrega aos otimizadores
+    return add_indicators(make_ohlcv(3000), cache=FeatureCache())
+
+PAIRS = [(5, 51), (9, 60), (20, 120), (50, 200), (12, 77)]
+
+def reference(df, fast, slow):
+    signals = StrategyEngine(df, cache=FeatureCache()).ma_cross_signals(fast, slow)
+    return run_backtest_signals(df, signals)[1]
+
+def test_grid_matches_run_backtest_signals(df):
+    results = evaluate_ma_grid(df, PAIRS)
+    for (fast, slow), row in zip(PAIRS, results.itertuples(index=False)):
+        metrics = reference(df, fast, slow)
+        np.testing.assert_allclose(row[2], metrics['Total Return %'], rtol=1e-9, atol=1e-9)
+        assert row[4] == metrics['Num Trades']
+
+def test_pruned_objective_matches_objective_ma(df):
+    cache = RollingMeanCache(_valid_close(df)[0])
+    for fast, slow in PAIRS:
+        params = {'fast_ma': fast, 'slow_ma': slow}
+        pruned = objective_ma_pruned(optuna.trial.FixedTrial(params), cache)
+        expected = objective_ma(optuna.trial.FixedTrial(params), df, cache=FeatureCache())
+        np.testing.assert_allclose(pruned, expected, rtol=1e-9, atol=1e-9)
+
+def test_walk_forward_ignores_indicator_columns(df):
+    raw = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+    kwargs = dict(train_size=1000, test_size=500, param_sets=PAIRS, n_workers=1)
+    folds, oos, metrics = walk_forward(df, **kwargs)
+    folds_raw, oos_raw, metrics_raw = walk_forward(raw, **kwargs)
+    assert folds[['fast_ma', 'slow_ma']].equals(folds_raw[['fast_ma', 'slow_ma']])
+    np.testing.assert_allclose(oos['equity'], oos_raw['equity'], rtol=1e-12)
+    assert len(oos) == len(df) - 1000
+
+def test_fingerprint_covers_interior_candles():
+    base = make_ohlcv(1000)
+    assert data_fingerprint(base) == data_fingerprint(base.copy())
+
+    interior = base.copy()
+    interior.loc[500, 'close'] *= 1.01
+    shifted = base.copy()
+    shifted.loc[300:400, 'timestamp'] += np.timedelta64(30, 's')
+    # Mesmo tamanho e mesmas pontas: antes davam o mesmo estudo
+    fingerprints = {data_fingerprint(d) for d in (base, interior, shifted)}
+    assert len(fingerprints) == 3
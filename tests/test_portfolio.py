@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from core.backtest_engine import backtest_kernel, portfolio_chunk_size, run_portfolio_backtest
+from benchmarks.bench_portfolio import make_matrix
+
+def with_gaps(close, seed=1):
+    # Buracos de dados: início tardio, barras isoladas e um trecho inteiro sem close
+    rng = np.random.default_rng(seed)
+    close = close.copy()
+    close[0, :37] = np.nan
+    close[1, rng.choice(close.shape[1], 300, replace=False)] = np.nan
+    close[2, 500:900] = np.nan
+    return close
+
+def sleeve_reference(close, signal, capital, fee_pct):
+    # Mesma fatia pelo kernel de um ativo, só nas barras com dado
+    valid = ~np.isnan(close)
+    equity = backtest_kernel(close[valid], signal[valid], capital, fee_pct)[0]
+    return valid, equity
+
+@pytest.mark.parametrize('gaps', [False, True])
+def test_sleeves_match_backtest_kernel(gaps):
+    close, signals = make_matrix(6, 3000)
+    # Sinais mais densos que os do benchmark para ter vários trades por ativo
+    signals = np.random.default_rng(3).choice(np.array([-1, 0, 1], dtype=np.int8), size=close.shape)
+    if gaps:
+        close = with_gaps(close)
+    weights = np.array([0.1, 0.2, 0.3, 0.1, 0.2, 0.1])
+    portfolio, final, trades, metrics = run_portfolio_backtest(close, signals, 1000, 0.001, weights, chunk_size=4)
+
+    expected_portfolio = np.zeros(close.shape[1])
+    for i in range(len(close)):
+        valid, equity = sleeve_reference(close[i], signals[i], 1000 * weights[i], 0.001)
+        np.testing.assert_allclose(final[i], equity[-1], rtol=1e-9)
+        # A fatia fica parada nos buracos: valor da última barra com dado (ou o capital inicial)
+        idx = np.maximum.accumulate(np.where(valid, np.arange(len(valid)), -1))
+        sleeve = np.where(idx >= 0, np.concatenate((equity, [np.nan]))[np.cumsum(valid) - 1], 1000 * weights[i])
+        expected_portfolio += sleeve
+
+        entries, exits = backtest_kernel(close[i][valid], signals[i][valid])[2:4]
+        bars = np.flatnonzero(valid)
+        mine = trades['symbol'] == i
+        np.testing.assert_array_equal(trades['bar'][mine & (trades['side'] == 1)], bars[entries])
+        np.testing.assert_array_equal(trades['bar'][mine & (trades['side'] == -1)], bars[exits])
+
+    np.testing.assert_allclose(portfolio, expected_portfolio, rtol=1e-9)
+    assert not np.isnan(trades['price']).any()
+    assert metrics['Final Equity'] == pytest.approx(final.sum())
+
+def test_chunking_does_not_change_results():
+    close, signals = make_matrix(9, 2000)
+    close = np.vstack([with_gaps(close[:3]), close[3:]])
+    one = run_portfolio_backtest(close, signals, chunk_size=1)
+    auto = run_portfolio_backtest(close, signals)
+    np.testing.assert_allclose(one[0], auto[0])
+    np.testing.assert_allclose(one[1], auto[1])
+    for key in one[2]:
+        np.testing.assert_array_equal(one[2][key], auto[2][key])
+
+def test_chunk_size_follows_memory_budget():
+    assert portfolio_chunk_size(1_000_000, 256 * 2**20) == 4
+    assert portfolio_chunk_size(10_000_000, 2**20) == 1
+    assert portfolio_chunk_size(1000, 256 * 2**20) > 1000
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_ohlcv
+from core.candle_store import OHLCV_DTYPE
+from core.indicators import SMA, FeatureCache
+from core.resample import Resampler, align_to_base, htf_features, resample_array, resample_ohlcv
+
+AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+def to_array(df):
+    arr = np.empty(len(df), dtype=OHLCV_DTYPE)
+    arr['timestamp'] = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+    for col in AGG:
+        arr[col] = df[col].to_numpy()
+    return arr
+
+def pandas_resample(df, rule):
+    out = df.set_index('timestamp').resample(rule, label='left', closed='left').agg(AGG)
+    return out.dropna().reset_index()
+
+@pytest.mark.parametrize('base_tf, freq, target_tf, rule, start', [
+    ('1m', '1min', '5m', '5min', '2020-01-01 00:00'),
+    ('1m', '1min', '1h', '1h', '2020-01-01 00:07'),
+    ('15m', '15min', '4h', '4h', '2020-01-01 01:45'),
+    ('1h', '1h', '1d', '1D', '2020-01-01 05:00'),
+    ('1d', '1D', '1w', 'W-MON', '2020-01-01'),
+])
+def test_resample_matches_pandas(base_tf, freq, target_tf, rule, start):
+    df = make_ohlcv(5000, freq=freq)
+    df['timestamp'] = pd.date_range(start, periods=len(df), freq=freq)
+
+    ours = resample_ohlcv(df, base_tf, target_tf)
+    expected = pandas_resample(df, rule)
+    if expected['timestamp'].iloc[0] < df['timestamp'].iloc[0]:
+        expected = expected.iloc[1:].reset_index(drop=True)  # primeiro candle incompleto
+    pd.testing.assert_frame_equal(ours, expected, check_dtype=False, check_freq=False)
+
+def test_resampler_matches_batch():
+    df = make_ohlcv(2000)
+    df['timestamp'] = pd.date_range('2020-01-01 00:03', periods=len(df), freq='1min')
+    arr = to_array(df)
+    resampler = Resampler('1m', '15m')
+    closed = []
+    for i, row in enumerate(arr):
+        candle = {name: row[name].item() for name in OHLCV_DTYPE.names}
+        if i % 3 == 0:
+            # Versão parcial do candle em formação, reenviada depois com os valores finais
+            closed += resampler.update({**candle, 'close': candle['open'], 'volume': 0.0})
+        closed += resampler.update(candle)
+
+    batch = resample_array(arr, '1m', '15m', drop_partial_first=False)
+    incremental = closed + [resampler.current]
+    assert len(incremental) == len(batch)
+    for name in OHLCV_DTYPE.names:
+        np.testing.assert_allclose([bar[name] for bar in incremental], batch[name])
+
+def test_align_to_base_uses_only_closed_candles():
+    base_ts = np.arange(0, 48) * 3_600_000                      # 48 barras de 1h
+    htf_ts = np.arange(0, 12) * 4 * 3_600_000                   # 12 barras de 4h
+    aligned = align_to_base(base_ts, '1h', htf_ts, '4h', np.arange(12.0))
+    assert np.isnan(aligned[:3]).all()
+    # A barra de 1h que fecha junto com o candle de 4h já o vê; as seguintes também
+    np.testing.assert_array_equal(aligned[3:7], [0, 0, 0, 0])
+    np.testing.assert_array_equal(aligned[7:11], [1, 1, 1, 1])
+    for i in range(len(base_ts)):
+        closed = htf_ts + 4 * 3_600_000 <= base_ts[i] + 3_600_000
+        assert np.isnan(aligned[i]) if not closed.any() else aligned[i] == np.flatnonzero(closed)[-1]
+
+def test_htf_features_have_no_look_ahead():
+    df = make_ohlcv(3000, freq='15min')
+    full = htf_features(df, '15m', '4h', [SMA(5)], cache=FeatureCache())['SMA_5_4h']
+    for end in (200, 517, 1234, 2999):
+        # Recalcular só com o passado dá o mesmo valor na última barra
+        head = htf_features(df.iloc[:end + 1], '15m', '4h', [SMA(5)], cache=FeatureCache())['SMA_5_4h']
+        np.testing.assert_allclose(head, full[:end + 1])
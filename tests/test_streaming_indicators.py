@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from core.indicators import FeatureCache, add_indicators
+from core.streaming_indicators import StreamingIndicators
+from benchmarks.synthetic import make_ohlcv
+
+@pytest.fixture(scope='module')
+def df():
+    return make_ohlcv(3000)
+
+@pytest.fixture(scope='module')
+def batch(df):
+    return add_indicators(df.copy(), cache=FeatureCache())
+
+def assert_matches_batch(out, batch, df):
+    for col in batch.columns.difference(df.columns):
+        np.testing.assert_allclose(out[col].to_numpy(float), batch[col].to_numpy(float),
+                                   rtol=1e-7, atol=1e-7, equal_nan=True, err_msg=col)
+
+def test_warm_up_matches_ta(df, batch):
+    assert_matches_batch(StreamingIndicators().warm_up(df), batch, df)
+
+def test_append_matches_ta(df, batch):
+    stream = StreamingIndicators()
+    stream.warm_up(df.iloc[:1500])
+    for candle in df.iloc[1500:].to_dict('records'):
+        row = stream.append(candle)
+    assert row['timestamp'] == df['timestamp'].iloc[-1]
+    out = stream.buffer.frame()
+    assert len(out) == len(df)
+    assert (out['timestamp'].to_numpy() == df['timestamp'].to_numpy()).all()
+    assert_matches_batch(out, batch, df)
+
+def test_append_without_warm_up(df, batch):
+    stream = StreamingIndicators()
+    for candle in df.iloc[:300].to_dict('records'):
+        stream.append(candle)
+    assert_matches_batch(stream.buffer.frame(), batch.iloc[:300], df)